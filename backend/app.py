@@ -1,38 +1,164 @@
 import os
 import logging
-from flask import Flask, send_file, request, jsonify
+from flask import Flask, send_file, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
 from pptx import Presentation
 from pptx.util import Pt, Inches
 from pptx.dml.color import RGBColor
-from pptx.chart.data import CategoryChartData
 from pptx.enum.chart import XL_CHART_TYPE
 from pptx.oxml.xmlchemy import OxmlElement
 from pptx.oxml.ns import qn
-import google.generativeai as genai
 import re
-import requests
 from io import BytesIO
 import base64
-import pandas as pd
 from dotenv import load_dotenv
 from pathlib import Path
-from fpdf import FPDF
-from PIL import Image
 from pptx.enum.text import PP_ALIGN
 from pptx.enum.shapes import MSO_SHAPE
 import tempfile
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+import queue
+import random
+import shutil
+import heapq
+import itertools
+import math
+from copy import deepcopy
+import contextvars
+import codecs
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import zipfile
+import zlib
 
 load_dotenv()
-logging.basicConfig(level=logging.DEBUG)
+# DEBUG is opt-in: at the default INFO level the hot path does not pay for debug record formatting
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.INFO))
 app = Flask(__name__)
 CORS(app)
 
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        # The extra trailing slot counts observations above the largest bucket
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bucket_labels = self.labelnames + ("le",)
+        with self._lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{format_labels(bucket_labels, key + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+# Lists collecting the fallback kinds taken in this context, one per enclosing track_fallbacks block
+current_fallbacks = contextvars.ContextVar("current_fallbacks", default=())
+
+class FallbackCounter(Counter):
+    # Also records each fallback in every track_fallbacks block of the current context
+    def inc(self, amount=1, **labels):
+        super().inc(amount, **labels)
+        for taken in current_fallbacks.get():
+            taken.append(labels.get("kind"))
+
+@contextmanager
+def track_fallbacks():
+    # Yields the list of fallback kinds taken inside the block, including in worker threads and tasks
+    # started with a copy of this context
+    taken = []
+    token = current_fallbacks.set(current_fallbacks.get() + (taken,))
+    try:
+        yield taken
+    finally:
+        current_fallbacks.reset(token)
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+# Metrics are kept per worker process; each gunicorn worker reports its own series on /metrics
+stage_seconds = Histogram("presentation_stage_seconds", "Time spent in each generation stage", ("stage",))
+request_seconds = Histogram("presentation_request_seconds", "End-to-end latency of generation endpoints", ("endpoint", "status"))
+upstream_errors = Counter("presentation_upstream_errors_total", "Failed upstream AI calls", ("provider", "kind"))
+fallbacks = FallbackCounter("presentation_fallbacks_total", "Slides or exports that used a fallback", ("kind",))
+rate_limit_wait = Histogram("presentation_rate_limit_wait_seconds", "Time upstream calls waited for quota", ("provider",))
+response_bytes = Counter("presentation_response_bytes_total", "Bytes sent by generation endpoints", ("endpoint",))
+coalesced = Counter("presentation_coalesced_total", "Generations served from an identical in-flight request", ("endpoint",))
+
+# Spans of the request being served; copied into worker threads by generate_slide_assets
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+@contextmanager
+def span(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        stage_seconds.observe(duration, stage=stage)
+        trace = current_trace.get()
+        if trace is not None:
+            trace["spans"].append((stage, round(duration * 1000, 1)))
+
 genai_api_key = os.environ.get('GENAI_API_KEY')
 if not genai_api_key:
     app.logger.error("GENAI_API_KEY is not set in the environment!")
     raise ValueError("GENAI_API_KEY is required")
-genai.configure(api_key=genai_api_key)
+# GENAI_API_ENDPOINT/GENAI_TRANSPORT allow pointing the client at a local stub server (e.g. "http://127.0.0.1:8080" with "rest")
+GENAI_API_ENDPOINT = os.environ.get('GENAI_API_ENDPOINT')
+GENAI_TRANSPORT = os.environ.get('GENAI_TRANSPORT')
 
 THEMES = {
     "corporate": {
@@ -151,6 +277,1110 @@ CHART_TYPES = {
 TITLE_FONT_SIZE = Pt(36)
 CONTENT_FONT_SIZE = Pt(20)
 
+# Chart data budget: bar/pie keep the largest categories plus "Other", line/scatter are downsampled
+CHART_MAX_CATEGORIES = int(os.environ.get('CHART_MAX_CATEGORIES', '12'))
+CHART_MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', '500'))
+CHART_MAX_SERIES = int(os.environ.get('CHART_MAX_SERIES', '4'))
+CHART_CSV_CHUNK_ROWS = int(os.environ.get('CHART_CSV_CHUNK_ROWS', '100000'))
+CHART_SAMPLE_ROWS = 1000
+
+# Maximum number of slides whose content/image calls are in flight at once
+GENERATION_CONCURRENCY = int(os.environ.get('GENERATION_CONCURRENCY', '4'))
+# Generated decks, spilled response buffers and job results live here and are swept by the janitor
+ARTIFACT_DIR = os.environ.get('ARTIFACT_DIR', os.path.join(tempfile.gettempdir(), 'presentation_artifacts'))
+ARTIFACT_TTL = int(os.environ.get('ARTIFACT_TTL', '3600'))
+ARTIFACT_SWEEP_INTERVAL = int(os.environ.get('ARTIFACT_SWEEP_INTERVAL', '300'))
+# Responses up to this size are built entirely in memory before streaming
+SPOOL_MAX_BYTES = int(os.environ.get('SPOOL_MAX_BYTES', str(16 * 1024 * 1024)))
+os.makedirs(ARTIFACT_DIR, exist_ok=True)
+# Identical concurrent generations share one run; the lock files and handed-over results live in ARTIFACT_DIR
+SINGLE_FLIGHT = os.environ.get('SINGLE_FLIGHT', 'true') == 'true'
+SINGLE_FLIGHT_WAIT = float(os.environ.get('SINGLE_FLIGHT_WAIT', '300'))
+SINGLE_FLIGHT_POLL = 0.05
+
+MIMETYPES = {
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "pdf": "application/pdf",
+}
+
+# Ask for titles and every slide body in a single structured LLM call
+BATCH_OUTLINE = os.environ.get('BATCH_OUTLINE', 'false') == 'true'
+
+# Uploaded text is read in pieces and, when too long for one prompt, map-reduced into a digest.
+# Token counts are estimated as characters / CHARS_PER_TOKEN.
+CHARS_PER_TOKEN = 4
+TEXT_READ_BYTES = 64 * 1024
+TEXT_CHUNK_TOKENS = int(os.environ.get('TEXT_CHUNK_TOKENS', '2000'))
+TEXT_DIRECT_TOKENS = int(os.environ.get('TEXT_DIRECT_TOKENS', '1500'))
+TEXT_MAX_BYTES = int(os.environ.get('TEXT_MAX_BYTES', str(20 * 1024 * 1024)))
+SUMMARY_WORDS = int(os.environ.get('SUMMARY_WORDS', '200'))
+# Partial summaries are folded into one whenever this many have accumulated
+SUMMARY_FANIN = int(os.environ.get('SUMMARY_FANIN', '8'))
+IMAGE_PROMPT_MAX_CHARS = int(os.environ.get('IMAGE_PROMPT_MAX_CHARS', '500'))
+
+TEXT_MODEL_NAME = "gemini-1.5-flash"
+# Text provider used when a request does not pick one (gemini, openai or local), and the provider
+# that takes over when it fails; empty disables the fallback
+TEXT_PROVIDER = os.environ.get('TEXT_PROVIDER', 'gemini')
+TEXT_PROVIDER_FALLBACK = os.environ.get('TEXT_PROVIDER_FALLBACK', '')
+# Any server speaking the OpenAI chat completions API (llama.cpp, vLLM, Ollama, ...)
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', 'http://127.0.0.1:8000/v1')
+OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'local-model')
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+LLM_CACHE_BACKEND = os.environ.get('LLM_CACHE_BACKEND', 'memory')  # memory, sqlite or none
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'presentation_llm_cache.sqlite3'))
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', '86400'))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '2000'))
+
+class MemoryCache:
+    # In-process LRU cache with per-entry TTL
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+class SQLiteCache:
+    # On-disk LRU cache shared by every worker process on the host
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, expires REAL, accessed REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, expires FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is None or row[1] < now:
+                    if row is not None:
+                        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._count(False)
+                    return None
+                conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            self._count(True)
+            return row[0]
+        except sqlite3.Error as e:
+            app.logger.warning(f"LLM cache read failed: {str(e)}")
+            self._count(False)
+            return None
+
+    def set(self, key, value):
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO llm_cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                             (key, value, now + self.ttl, now))
+                conn.execute("DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                             (self.max_entries,))
+        except sqlite3.Error as e:
+            app.logger.warning(f"LLM cache write failed: {str(e)}")
+
+    def stats(self):
+        entries = None
+        try:
+            entries = self._connect().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            return {"backend": "sqlite", "hits": self.hits, "misses": self.misses, "entries": entries}
+
+class DiskLRUStore:
+    # Directory of raw files capped at max_bytes; the least recently used files (by atime, which hits
+    # set explicitly) are evicted first. mtime stays the write time, so entries older than max_age
+    # seconds are dropped on lookup. Writes are atomic renames, so several worker processes can
+    # share one directory.
+    def __init__(self, directory, max_bytes, suffix="", max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        path = self.path_for(key)
+        try:
+            now = time.time()
+            written = os.stat(path).st_mtime
+            if self.max_age and now - written > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            os.utime(path, (now, written))
+        except OSError:
+            self._count(False)
+            return None
+        self._count(True)
+        return path
+
+    def put(self, key, data):
+        return self.put_stream(key, BytesIO(data))
+
+    def put_stream(self, key, stream):
+        path = self.path_for(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp_file:
+                shutil.copyfileobj(stream, tmp_file, 1024 * 1024)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            app.logger.warning(f"Could not write {path} to disk cache: {str(e)}")
+            return None
+        self.evict()
+        return path
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix) and not entry.name.endswith(".tmp"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        try:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        except OSError as e:
+            app.logger.warning(f"Disk cache eviction failed: {str(e)}")
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {"backend": "disk", "hits": self.hits, "misses": self.misses,
+                    "entries": len(entries), "bytes": sum(size for _, size, _ in entries)}
+
+def create_llm_cache():
+    if LLM_CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+    if LLM_CACHE_BACKEND == 'memory':
+        return MemoryCache(LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+    return None
+
+llm_cache = create_llm_cache()
+
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'presentation_image_cache'))
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get('IMAGE_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+
+# Generated images are downscaled to their on-slide size and re-encoded before they are cached or embedded
+IMAGE_WIDTH_INCHES = 5.5
+IMAGE_DPI = int(os.environ.get('IMAGE_DPI', '150'))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '85'))
+
+# Entries are already post-processed (JPEG or PNG), so the cache key covers the processing settings
+image_cache = DiskLRUStore(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, ".img") if IMAGE_CACHE_MAX_BYTES > 0 else None
+
+# Finished PPTX/PDF files keyed on the generation inputs (see generation_key); 0 disables the cache
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'presentation_result_cache'))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+# Cached files are regenerated after RESULT_CACHE_TTL seconds
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', '86400'))
+# How long browsers may reuse a downloaded deck without asking again
+RESULT_CACHE_MAX_AGE = int(os.environ.get('RESULT_CACHE_MAX_AGE', '3600'))
+
+result_cache = DiskLRUStore(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, max_age=RESULT_CACHE_TTL) if RESULT_CACHE_MAX_BYTES > 0 else None
+
+# Near-duplicate topics ("ML for Healthcare" / "Machine Learning in Healthcare") reuse an earlier
+# outline as their draft instead of paying for new titles and bodies. Off by default.
+SIMILAR_TOPICS = os.environ.get('SIMILAR_TOPICS', 'false') == 'true'
+# Share of the IDF-weighted topic terms two topics must have in common (see match_topic_terms)
+SIMILAR_TOPIC_THRESHOLD = float(os.environ.get('SIMILAR_TOPIC_THRESHOLD', '0.9'))
+SIMILAR_TOPIC_DB_PATH = os.environ.get('SIMILAR_TOPIC_DB_PATH', os.path.join(tempfile.gettempdir(), 'presentation_topics.sqlite3'))
+# How often a worker picks up outlines stored by the other workers
+SIMILAR_TOPIC_SYNC_SECONDS = 5
+# Stored topics scored exactly per lookup, picked by their cosine similarity to the query
+SIMILAR_TOPIC_CANDIDATES = 8
+# Common terms keep at least this weight, so a shared "history" cannot outweigh "greece" vs "egypt"
+# while the index is small and every IDF is close to zero
+SIMILAR_TOPIC_IDF_FLOOR = 1.0
+# Decks whose text needed any of these fallbacks are not indexed
+SIMILAR_TOPIC_FALLBACKS = frozenset(("titles", "content", "provider"))
+# Function words and generic deck words that do not change what a topic is about
+SIMILAR_TOPIC_STOPWORDS = frozenset("""a an and are as at by for from how in into is its of on or the to vs versus
+    with about introduction intro overview basics fundamentals guide presentation""".split())
+ROMAN_NUMERAL = re.compile(r"(?=[ivx])x{0,3}(ix|iv|v?i{0,3})")
+
+def topic_terms(text):
+    # Casefolded content words in topic order, without stop words and with a plural "s" trimmed
+    terms = []
+    for word in re.sub(r"[^\wऀ-ൿ]+", " ", text.casefold()).split():
+        if word in SIMILAR_TOPIC_STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+def is_numeral(term):
+    return term.isdigit() or ROMAN_NUMERAL.fullmatch(term) is not None
+
+def term_initialisms(terms):
+    # (initials, start, end) for every run of 2-5 consecutive terms, e.g. ("ml", 0, 2) for machine learning
+    return [("".join(term[0] for term in terms[start:end]), start, end)
+            for start in range(len(terms)) for end in range(start + 2, min(start + 5, len(terms)) + 1)]
+
+def match_topic_terms(query, stored, weight):
+    # Weighted share of the terms of both topics that pair up, either as equal terms or as an initialism
+    # and the words it abbreviates ("ml" / "machine learning"). An unpaired number or numeral ("ii",
+    # "2024") names a different subject outright, so it scores 0.
+    sides = (query, stored)
+    paired = ([False] * len(query), [False] * len(stored))
+    positions = {}
+    for index, term in enumerate(stored):
+        positions.setdefault(term, []).append(index)
+    for index, term in enumerate(query):
+        if positions.get(term):
+            paired[0][index] = True
+            paired[1][positions[term].pop(0)] = True
+    for short, long in ((0, 1), (1, 0)):
+        for index, term in enumerate(sides[short]):
+            if paired[short][index] or not 2 <= len(term) <= 5 or not term.isalpha():
+                continue
+            for initials, start, end in term_initialisms(sides[long]):
+                if initials == term and not any(paired[long][start:end]):
+                    paired[short][index] = True
+                    paired[long][start:end] = [True] * (end - start)
+                    break
+    total = matched = 0.0
+    for terms, flags in zip(sides, paired):
+        for term, flag in zip(terms, flags):
+            if not flag and is_numeral(term):
+                return 0.0
+            total += weight(term)
+            if flag:
+                matched += weight(term)
+    return matched / total if total else 0.0
+
+def topic_keys(terms):
+    # Terms plus the initials of their runs, so "ML" and "Machine Learning" share a key
+    return set(terms) | {initials for initials, _, _ in term_initialisms(terms)}
+
+class TopicTerms:
+    # Stored topics of one index group as IDF-weighted vectors over their topic_keys. A lookup ranks
+    # every row by cosine similarity in NumPy and scores only the best few exactly with
+    # match_topic_terms. add() queues rows and refresh() rebuilds the arrays from them; it publishes a
+    # new snapshot and never changes the arrays of an older one, so lookups need no lock.
+    def __init__(self):
+        import numpy as np
+        self.ids = []
+        self.terms = []
+        self.key_ids = {}
+        self.postings = {}
+        self.df = np.zeros(0)
+        self.row_keys = np.zeros(0, dtype=np.int64)
+        self.key_rows = np.zeros(0, dtype=np.int64)
+        self.snapshot = None
+        self._pending = []
+
+    def add(self, row_id, terms):
+        self._pending.append((row_id, terms))
+
+    def refresh(self):
+        # Caller serialises refreshes; the cost is one pass over the new rows plus a few
+        # vector operations over the whole group
+        import numpy as np
+        if not self._pending:
+            return
+        row_keys, key_rows, term_keys, new_postings = [], [], [], {}
+        for row_id, terms in self._pending:
+            row = len(self.ids)
+            self.ids.append(row_id)
+            self.terms.append(terms)
+            for key in topic_keys(terms):
+                key_id = self.key_ids.setdefault(key, len(self.key_ids))
+                row_keys.append(key_id)
+                key_rows.append(row)
+                new_postings.setdefault(key_id, []).append(row)
+            term_keys.extend(self.key_ids[term] for term in set(terms))
+        self._pending = []
+        count = len(self.ids)
+        df = np.bincount(np.array(term_keys, dtype=np.int64), minlength=len(self.key_ids)).astype(float)
+        df[:len(self.df)] += self.df
+        self.df = df
+        self.row_keys = np.concatenate((self.row_keys, np.array(row_keys, dtype=np.int64)))
+        self.key_rows = np.concatenate((self.key_rows, np.array(key_rows, dtype=np.int64)))
+        for key_id, rows in new_postings.items():
+            previous = self.postings.get(key_id)
+            rows = np.array(rows, dtype=np.int64)
+            self.postings[key_id] = rows if previous is None else np.concatenate((previous, rows))
+        weights = np.maximum(SIMILAR_TOPIC_IDF_FLOOR, np.log((count + 1) / (df + 1)))
+        norms = np.sqrt(np.bincount(self.key_rows, weights=weights[self.row_keys] ** 2, minlength=count))
+        norms[norms == 0] = 1.0
+        self.snapshot = (count, weights, norms)
+
+    def nearest(self, terms):
+        import numpy as np
+        snapshot = self.snapshot
+        if snapshot is None or not terms:
+            return None, 0.0
+        count, weights, norms = snapshot
+        unseen = max(SIMILAR_TOPIC_IDF_FLOOR, math.log(count + 1))
+
+        known = {}
+
+        def weight(term):
+            # Keys added after this snapshot count as unseen
+            if term not in known:
+                key_id = self.key_ids.get(term)
+                known[term] = float(weights[key_id]) if key_id is not None and key_id < len(weights) else unseen
+            return known[term]
+
+        keys = topic_keys(terms)
+        key_ids = [key_id for key_id in map(self.key_ids.get, keys) if key_id is not None and key_id < len(weights)]
+        if not key_ids:
+            return None, 0.0
+        postings = [self.postings[key_id] for key_id in key_ids]
+        # Rows of a later refresh can already be in the postings; only the first `count` belong here
+        dots = np.bincount(np.concatenate(postings), minlength=count,
+                           weights=np.repeat(weights[key_ids] ** 2, [len(rows) for rows in postings]))[:count]
+        cosine = dots / (norms * math.sqrt(sum(weight(key) ** 2 for key in keys)))
+        candidates = np.arange(count)
+        if count > SIMILAR_TOPIC_CANDIDATES:
+            candidates = np.argpartition(-cosine, SIMILAR_TOPIC_CANDIDATES - 1)[:SIMILAR_TOPIC_CANDIDATES]
+        candidates = candidates[dots[candidates] > 0]
+        best_id, best_score = None, 0.0
+        for row in candidates[np.argsort(-cosine[candidates], kind="stable")]:
+            score = match_topic_terms(terms, self.terms[row], weight)
+            if score > best_score:
+                best_id, best_score = self.ids[row], score
+                if score >= 1.0:
+                    break
+        return best_id, best_score
+
+class SimilarTopicIndex:
+    # Outlines of earlier topic-only decks, stored in SQLite and indexed in memory per
+    # (language, include_images). Every worker builds its index from the stored topics on first use
+    # and appends rows other workers added since its last sync.
+    def __init__(self, path, threshold):
+        self.path = path
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._groups = {}
+        self._last_id = 0
+        self._synced = None
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS similar_topics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, language TEXT, has_image INTEGER, topic TEXT,
+                titles TEXT, contents TEXT, created REAL, UNIQUE (language, has_image, topic))""")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _sync(self):
+        # Caller holds self._lock
+        rows = self._connect().execute("SELECT id, language, has_image, topic FROM similar_topics WHERE id > ? ORDER BY id",
+                                       (self._last_id,)).fetchall()
+        for row in rows:
+            group = (row["language"], bool(row["has_image"]))
+            if group not in self._groups:
+                self._groups[group] = TopicTerms()
+            self._groups[group].add(row["id"], topic_terms(row["topic"]))
+            self._last_id = row["id"]
+        for group in self._groups.values():
+            group.refresh()
+        self._synced = time.monotonic()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, topic, language, include_images, slide_count):
+        # Returns {"topic", "similarity", "titles", "contents"} for the closest stored outline with at
+        # least slide_count slides, or None
+        try:
+            with self._lock:
+                if self._synced is None or time.monotonic() - self._synced >= SIMILAR_TOPIC_SYNC_SECONDS:
+                    self._sync()
+                group = self._groups.get((language, bool(include_images)))
+            # Scoring reads the group's published snapshot, so concurrent lookups do not queue on the lock
+            row_id, similarity = group.nearest(topic_terms(topic)) if group else (None, 0.0)
+            row = None
+            if row_id is not None and similarity >= self.threshold:
+                row = self._connect().execute("SELECT topic, titles, contents FROM similar_topics WHERE id = ?",
+                                              (row_id,)).fetchone()
+            titles = json.loads(row["titles"]) if row else []
+            if len(titles) < slide_count:
+                self._count(False)
+                return None
+            self._count(True)
+            return {"topic": row["topic"], "similarity": similarity, "titles": titles[:slide_count],
+                    "contents": json.loads(row["contents"])[:slide_count]}
+        except (sqlite3.Error, ValueError) as e:
+            app.logger.warning(f"Similar topic lookup failed: {str(e)}")
+            return None
+
+    def add(self, topic, language, include_images, titles, contents):
+        try:
+            with self._connect() as conn:
+                conn.execute("""INSERT INTO similar_topics (language, has_image, topic, titles, contents, created)
+                                VALUES (?, ?, ?, ?, ?, ?)
+                                ON CONFLICT (language, has_image, topic) DO UPDATE
+                                SET titles = excluded.titles, contents = excluded.contents, created = excluded.created""",
+                             (language, int(bool(include_images)), " ".join(topic.split()),
+                              json.dumps(titles, ensure_ascii=False), json.dumps(contents, ensure_ascii=False),
+                              time.time()))
+            with self._lock:
+                self._sync()
+        except sqlite3.Error as e:
+            app.logger.warning(f"Could not index outline for {topic}: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "sqlite", "hits": self.hits, "misses": self.misses,
+                    "entries": sum(len(group.ids) for group in self._groups.values()),
+                    "threshold": self.threshold}
+
+similar_topics = SimilarTopicIndex(SIMILAR_TOPIC_DB_PATH, SIMILAR_TOPIC_THRESHOLD) if SIMILAR_TOPICS else None
+
+def image_cache_key(api_url, payload):
+    # Prompts that only differ in case or whitespace map to the same image
+    normalized = dict(payload)
+    normalized["text_prompts"] = [
+        {**text_prompt, "text": " ".join(text_prompt["text"].lower().split())}
+        for text_prompt in payload["text_prompts"]
+    ]
+    key_source = json.dumps([api_url, normalized, IMAGE_WIDTH_INCHES, IMAGE_DPI, IMAGE_JPEG_QUALITY],
+                            sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+def llm_cache_key(prompt, language, has_image=None, desired_count=None, model_name=TEXT_MODEL_NAME):
+    key_source = json.dumps([model_name, prompt, language, has_image, desired_count], ensure_ascii=False)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+STABILITY_API_HOST = os.environ.get('STABILITY_API_HOST', 'https://api.stability.ai')
+GENAI_TIMEOUT = float(os.environ.get('GENAI_TIMEOUT', '60'))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '90'))
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '16'))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', '0.5'))
+HTTP_BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', '8'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.environ.get('CIRCUIT_RESET_SECONDS', '30'))
+# Upstream quotas shared by every worker process on the host; 0 disables a limit
+GEMINI_RPM = int(os.environ.get('GEMINI_RPM', '2000'))
+GEMINI_TPM = int(os.environ.get('GEMINI_TPM', '4000000'))
+STABILITY_RPM = int(os.environ.get('STABILITY_RPM', '900'))
+OPENAI_RPM = int(os.environ.get('OPENAI_RPM', '0'))
+OPENAI_TPM = int(os.environ.get('OPENAI_TPM', '0'))
+RATE_LIMIT_DB_PATH = os.environ.get('RATE_LIMIT_DB_PATH', os.path.join(tempfile.gettempdir(), 'presentation_rate_limits.sqlite3'))
+RATE_LIMIT_MAX_WAIT = float(os.environ.get('RATE_LIMIT_MAX_WAIT', '120'))
+# After a 429 without Retry-After every worker pauses the provider for this long, doubling on each
+# further 429 up to RATE_LIMIT_BLOCK_MAX
+RATE_LIMIT_BLOCK_SECONDS = float(os.environ.get('RATE_LIMIT_BLOCK_SECONDS', '1'))
+RATE_LIMIT_BLOCK_MAX = float(os.environ.get('RATE_LIMIT_BLOCK_MAX', '60'))
+# Output tokens reserved per text call when the request does not set max_output_tokens
+RATE_LIMIT_OUTPUT_TOKENS = 512
+
+# Callers waiting on a rate limiter are served in this order; titles gate everything else
+PRIORITY_TITLES = 0
+PRIORITY_CONTENT = 1
+PRIORITY_IMAGE = 2
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures and fails fast until reset_seconds have passed,
+    # then lets a single trial call through (half-open) to decide whether to close again.
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_in_flight:
+                raise CircuitOpenError(f"{self.name} circuit is open, skipping upstream call")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                app.logger.warning(f"{self.name} circuit opened after {self.failures} failures")
+
+    def record_ignored(self):
+        # The call finished with an error that says nothing about upstream health (e.g. a 400)
+        with self._lock:
+            self.trial_in_flight = False
+
+gemini_circuit = CircuitBreaker("gemini")
+stability_circuit = CircuitBreaker("stability")
+openai_circuit = CircuitBreaker("openai")
+
+class RateLimitTimeout(Exception):
+    pass
+
+class RateLimiter:
+    # Token buckets for requests and tokens per minute, kept in SQLite so all worker processes draw
+    # from the same quota. Within a process, waiters queue by (priority, arrival) and only the head
+    # of the queue polls the shared bucket. A 429 also blocks the provider for every worker until a
+    # shared blocked_until has passed.
+    def __init__(self, name, rpm, tpm=0, path=RATE_LIMIT_DB_PATH):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.path = path
+        self._conn = None
+        self._waiters = []
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets (name TEXT PRIMARY KEY, level REAL, updated REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_blocks (name TEXT PRIMARY KEY, blocked_until REAL, strikes INTEGER)")
+            self._conn = conn
+        return self._conn
+
+    def _buckets(self, tokens):
+        # (bucket name, capacity, cost); a single call can never need more than a full bucket
+        buckets = []
+        if self.rpm:
+            buckets.append((f"{self.name}:requests", self.rpm, 1))
+        if self.tpm:
+            buckets.append((f"{self.name}:tokens", self.tpm, min(tokens, self.tpm)))
+        return buckets
+
+    def _take(self, tokens):
+        # Takes from every bucket or from none; returns 0 on success, otherwise the seconds to wait
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT blocked_until FROM rate_blocks WHERE name = ?", (self.name,)).fetchone()
+            if row is not None and row[0] > now:
+                conn.execute("COMMIT")
+                return row[0] - now
+            levels = []
+            wait = 0
+            for name, capacity, cost in self._buckets(tokens):
+                row = conn.execute("SELECT level, updated FROM rate_buckets WHERE name = ?", (name,)).fetchone()
+                level = capacity if row is None else min(capacity, row[0] + (now - row[1]) * capacity / 60)
+                levels.append((name, level, cost))
+                if level < cost:
+                    wait = max(wait, (cost - level) * 60 / capacity)
+            for name, level, cost in levels:
+                conn.execute("INSERT OR REPLACE INTO rate_buckets (name, level, updated) VALUES (?, ?, ?)",
+                             (name, level if wait else level - cost, now))
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self, tokens=0, priority=PRIORITY_CONTENT):
+        # Blocks until the call fits the quota; returns the seconds spent waiting
+        if not self._buckets(tokens):
+            return 0
+        entry = (priority, next(self._arrivals))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            self._cond.notify_all()
+            try:
+                while True:
+                    if self._waiters[0] != entry:
+                        self._cond.wait()
+                        continue
+                    try:
+                        wait = self._take(tokens)
+                    except sqlite3.Error as e:
+                        app.logger.warning(f"{self.name} rate limiter unavailable, not limiting: {str(e)}")
+                        wait = 0
+                    waited = time.monotonic() - start
+                    if not wait:
+                        rate_limit_wait.observe(waited, provider=self.name)
+                        return waited
+                    if waited + wait > RATE_LIMIT_MAX_WAIT:
+                        raise RateLimitTimeout(f"{self.name} quota exhausted, gave up after {waited:.1f}s")
+                    # A higher-priority caller arriving meanwhile takes over the head of the queue
+                    self._cond.wait(min(wait, 1.0))
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def adjust(self, tokens):
+        # Settles the token bucket once the real usage is known (negative values give tokens back)
+        if not self.tpm or not tokens:
+            return
+        with self._cond:
+            try:
+                conn = self._connect()
+                conn.execute("UPDATE rate_buckets SET level = MIN(?, level - ?) WHERE name = ?",
+                             (self.tpm, tokens, f"{self.name}:tokens"))
+            except sqlite3.Error as e:
+                app.logger.warning(f"{self.name} rate limiter adjustment failed: {str(e)}")
+
+    def drain(self, retry_after=None):
+        # The upstream answered 429: empty the shared buckets and block the provider for every worker,
+        # for retry_after seconds when the upstream said how long, otherwise for an exponential window.
+        # 429s for calls sent before the current block began do not lengthen it.
+        with self._cond:
+            conn = None
+            try:
+                conn = self._connect()
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE rate_buckets SET level = MIN(level, 0), updated = ? WHERE name LIKE ?",
+                             (now, f"{self.name}:%"))
+                row = conn.execute("SELECT blocked_until, strikes FROM rate_blocks WHERE name = ?", (self.name,)).fetchone()
+                blocked_until, strikes = row if row is not None else (0, 0)
+                if blocked_until <= now:
+                    # Consecutive 429s (each arriving within the maximum window of the last block) escalate
+                    strikes = strikes + 1 if now - blocked_until < RATE_LIMIT_BLOCK_MAX else 1
+                    window = min(RATE_LIMIT_BLOCK_MAX, RATE_LIMIT_BLOCK_SECONDS * 2 ** (strikes - 1))
+                    blocked_until = now + window
+                if retry_after is not None:
+                    blocked_until = max(blocked_until, now + retry_after)
+                conn.execute("INSERT OR REPLACE INTO rate_blocks (name, blocked_until, strikes) VALUES (?, ?, ?)",
+                             (self.name, blocked_until, strikes))
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if conn is not None and conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                app.logger.warning(f"{self.name} rate limiter drain failed: {str(e)}")
+
+gemini_limiter = RateLimiter("gemini", GEMINI_RPM, GEMINI_TPM)
+stability_limiter = RateLimiter("stability", STABILITY_RPM)
+openai_limiter = RateLimiter("openai", OPENAI_RPM, OPENAI_TPM)
+
+def backoff_delay(attempt, retry_after=None):
+    # Full-jitter exponential backoff, honouring Retry-After when the upstream sends one
+    delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, HTTP_BACKOFF_MAX))
+    return delay
+
+def call_with_retries(func, is_retryable, circuit, retry_after=None):
+    try:
+        circuit.before_call()
+    except CircuitOpenError:
+        upstream_errors.inc(provider=circuit.name, kind="circuit_open")
+        raise
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            result = func()
+        except Exception as e:
+            if not is_retryable(e):
+                upstream_errors.inc(provider=circuit.name, kind="fatal")
+                circuit.record_ignored()
+                raise
+            upstream_errors.inc(provider=circuit.name, kind="retryable")
+            if attempt == HTTP_MAX_RETRIES:
+                circuit.record_failure()
+                raise
+            delay = backoff_delay(attempt, retry_after(e) if retry_after else None)
+            app.logger.warning(f"{circuit.name} call failed ({str(e)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            continue
+        circuit.record_success()
+        return result
+
+http_session = None
+http_session_lock = threading.Lock()
+
+def get_http_session():
+    # One pooled keep-alive session per process, shared by all request threads
+    global http_session
+    import requests
+    with http_session_lock:
+        if http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            http_session = session
+        return http_session
+
+def is_retryable_http_error(error):
+    import requests
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+def retry_after_seconds(headers):
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def http_retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None or getattr(response, "headers", None) is None:
+        return None
+    return retry_after_seconds(response.headers)
+
+def post_json(url, payload, headers, circuit, limiter=None, priority=PRIORITY_CONTENT, tokens=0):
+    def send():
+        if limiter:
+            limiter.acquire(tokens, priority)
+        response = get_http_session().post(url, headers=headers, json=payload,
+                                           timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        if limiter and response.status_code == 429:
+            limiter.drain(retry_after_seconds(response.headers))
+        response.raise_for_status()
+        return response.json()
+    return call_with_retries(send, is_retryable_http_error, circuit, http_retry_after)
+
+def is_retryable_genai_error(error):
+    import requests
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(error, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServerError,
+        google_exceptions.DeadlineExceeded,
+        requests.ConnectionError,
+        requests.Timeout,
+    ))
+
+text_models = {}
+text_models_lock = threading.Lock()
+
+def get_text_model(model_name=TEXT_MODEL_NAME):
+    # google.generativeai and its gRPC/protobuf stack are only imported and configured on the first call
+    import google.generativeai as genai
+    with text_models_lock:
+        if not text_models:
+            genai.configure(
+                api_key=genai_api_key,
+                transport=GENAI_TRANSPORT,
+                client_options={"api_endpoint": GENAI_API_ENDPOINT} if GENAI_API_ENDPOINT else None,
+            )
+        if model_name not in text_models:
+            text_models[model_name] = genai.GenerativeModel(model_name)
+        return text_models[model_name]
+
+def reserved_tokens(prompt, generation_config=None):
+    max_output_tokens = (generation_config or {}).get("max_output_tokens") or RATE_LIMIT_OUTPUT_TOKENS
+    return len(prompt) // CHARS_PER_TOKEN + max_output_tokens
+
+class GeminiProvider:
+    name = "gemini"
+    cache_name = TEXT_MODEL_NAME
+    supports_outline = True
+
+    def generate(self, prompt, task=None, generation_config=None, priority=PRIORITY_CONTENT):
+        model = get_text_model()
+        tokens = reserved_tokens(prompt, generation_config)
+        
+        def send():
+            from google.api_core import exceptions as google_exceptions
+            gemini_limiter.acquire(tokens, priority)
+            try:
+                # The client's built-in retry is disabled so call_with_retries owns backoff and the circuit breaker
+                return model.generate_content(prompt, generation_config=generation_config,
+                                              request_options={"timeout": GENAI_TIMEOUT, "retry": None})
+            except (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted) as e:
+                gemini_limiter.drain(http_retry_after(e))
+                raise
+        
+        response = call_with_retries(send, is_retryable_genai_error, gemini_circuit)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and getattr(usage, "total_token_count", None):
+            gemini_limiter.adjust(usage.total_token_count - tokens)
+        return response.text.strip()
+
+class OpenAICompatibleProvider:
+    name = "openai"
+    supports_outline = True
+
+    def __init__(self, base_url=OPENAI_BASE_URL, model=OPENAI_MODEL, api_key=OPENAI_API_KEY):
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.cache_name = f"openai:{model}"
+
+    def generate(self, prompt, task=None, generation_config=None, priority=PRIORITY_CONTENT):
+        generation_config = generation_config or {}
+        payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+        if generation_config.get("max_output_tokens"):
+            payload["max_tokens"] = generation_config["max_output_tokens"]
+        if generation_config.get("response_mime_type") == "application/json":
+            payload["response_format"] = {"type": "json_object"}
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        
+        data = post_json(self.url, payload, headers, openai_circuit, openai_limiter, priority,
+                         reserved_tokens(prompt, generation_config))
+        return data["choices"][0]["message"]["content"].strip()
+
+class LocalTemplateProvider:
+    # Extractive/template generator that runs on the CPU with no network access. Titles come from the
+    # topic or the most frequent phrases of the uploaded text, slide bodies from the source sentences
+    # that best match the slide title, summaries from the highest-scoring sentences. Free-form prompts
+    # such as the batched outline are not supported (supports_outline), so decks use the per-slide path.
+    name = "local"
+    cache_name = None
+    supports_outline = False
+    ASPECTS = ("Overview", "Key Concepts", "Applications", "Benefits", "Challenges", "Best Practices",
+               "Case Studies", "Future Trends", "Impact", "Next Steps")
+    STOPWORDS = frozenset("""a an and are as at be been but by can for from has have how in into is it its of on or
+        that the their there these this those to was were what when which while who will with within without
+        also more most other such than then they we you our your not may used use using""".split())
+    PARAGRAPH_TEMPLATES = (
+        "{title} brings together the ideas, tools and practices that define this area. "
+        "Understanding it helps teams make informed decisions.",
+        "Applying {title} well means starting small, measuring results and improving step by step "
+        "as experience grows.",
+    )
+    BULLET_TEMPLATES = (
+        "What {title} means and why it matters",
+        "Core principles behind {title}",
+        "Where {title} delivers the most value",
+        "Common challenges and how to address them",
+        "Practical steps to get started",
+        "How to measure progress and success",
+    )
+
+    def generate(self, prompt, task=None, generation_config=None, priority=PRIORITY_CONTENT):
+        kind = (task or {}).get("kind")
+        if kind == "titles":
+            return "\n".join(self.titles(task["content"], task["count"]))
+        if kind == "content":
+            return self.content(task["title"], task["has_image"], task.get("context"))
+        if kind == "summary":
+            return self.summary(task["text"])
+        raise NotImplementedError(f"The local provider cannot answer {kind or 'free-form'} prompts")
+
+    def words(self, text):
+        return [word for word in re.findall(r'\w+', text.lower()) if word not in self.STOPWORDS and len(word) > 2]
+
+    def sentences(self, text):
+        # Lines are split too, and list/heading markers dropped, so markdown-ish uploads read cleanly
+        pieces = re.split(r'(?<=[.!?।])\s+|\n+', text)
+        pieces = [re.sub(r'^[\s#>*\-\d.)]+', '', piece).strip() for piece in pieces]
+        return [piece for piece in pieces if len(piece.split()) >= 4]
+
+    def titles(self, content, count):
+        if len(content.split()) <= 12:
+            subject = " ".join(content.split())
+            phrases = []
+        else:
+            # Documents usually open with a heading; otherwise the most frequent phrase carries the topic
+            first_line = re.sub(r'^[\s#>*\-]+', '', content.strip().split("\n")[0]).strip()
+            phrases = self.key_phrases(content, count)
+            if 0 < len(first_line.split()) <= 10:
+                subject = first_line
+            else:
+                subject = phrases.pop(0).title() if phrases else "Overview"
+        titles = [subject] + [phrase.title() for phrase in phrases]
+        for aspect in self.ASPECTS:
+            if len(titles) >= count:
+                break
+            titles.append(f"{subject} {aspect}")
+        return titles[:count]
+
+    def key_phrases(self, text, count):
+        tokens = [word for word in re.findall(r'\w+', text.lower())]
+        bigrams = OrderedDict()
+        for first, second in zip(tokens, tokens[1:]):
+            if first in self.STOPWORDS or second in self.STOPWORDS or len(first) < 3 or len(second) < 3:
+                continue
+            phrase = f"{first} {second}"
+            bigrams[phrase] = bigrams.get(phrase, 0) + 1
+        unigrams = OrderedDict()
+        for word in self.words(text):
+            unigrams[word] = unigrams.get(word, 0) + 1
+        ranked = [phrase for phrase, hits in sorted(bigrams.items(), key=lambda item: -item[1]) if hits > 1]
+        ranked += [word for word, _ in sorted(unigrams.items(), key=lambda item: -item[1])
+                   if not any(word in phrase.split() for phrase in ranked)]
+        return ranked[:count]
+
+    def relevant_sentences(self, title, context, limit):
+        keywords = set(self.words(title))
+        scored = []
+        for position, sentence in enumerate(self.sentences(context or "")):
+            score = len(keywords & set(self.words(sentence)))
+            if score:
+                scored.append((score, position, sentence))
+        best = sorted(scored, key=lambda item: (-item[0], item[1]))[:limit]
+        return [sentence for _, _, sentence in sorted(best, key=lambda item: item[1])]
+
+    def content(self, title, has_image, context=None):
+        if has_image:
+            picked = self.relevant_sentences(title, context, 4)
+            if len(picked) < 2:
+                return "\n\n".join(template.format(title=title) for template in self.PARAGRAPH_TEMPLATES)
+            middle = (len(picked) + 1) // 2
+            return "\n\n".join(" ".join(" ".join(part).split()[:50]) for part in (picked[:middle], picked[middle:]))
+        picked = self.relevant_sentences(title, context, 6)
+        bullets = [" ".join(sentence.split()[:25]) for sentence in picked]
+        bullets += [template.format(title=title) for template in self.BULLET_TEMPLATES[len(bullets):]]
+        return "\n".join(f"- {bullet}" for bullet in bullets[:6])
+
+    def summary(self, text):
+        frequencies = {}
+        for word in self.words(text):
+            frequencies[word] = frequencies.get(word, 0) + 1
+        sentences = self.sentences(text) or [text]
+        scored = sorted(
+            range(len(sentences)),
+            key=lambda index: -sum(frequencies.get(word, 0) for word in self.words(sentences[index]))
+            / (len(sentences[index].split()) or 1))
+        chosen, words = [], 0
+        for index in scored:
+            length = len(sentences[index].split())
+            if chosen and words + length > SUMMARY_WORDS:
+                continue
+            chosen.append(index)
+            words += length
+        return " ".join(" ".join(sentences[index] for index in sorted(chosen)).split()[:SUMMARY_WORDS])
+
+TEXT_PROVIDERS = {
+    "gemini": GeminiProvider,
+    "openai": OpenAICompatibleProvider,
+    "local": LocalTemplateProvider,
+}
+text_providers = {}
+text_providers_lock = threading.Lock()
+
+def get_text_provider(name=None):
+    # Unknown or missing names resolve to TEXT_PROVIDER; instances are shared per process
+    if name not in TEXT_PROVIDERS:
+        name = TEXT_PROVIDER if TEXT_PROVIDER in TEXT_PROVIDERS else "gemini"
+    with text_providers_lock:
+        if name not in text_providers:
+            text_providers[name] = TEXT_PROVIDERS[name]()
+        return text_providers[name]
+
+def generate_text(prompt, language="en", has_image=None, desired_count=None, generation_config=None, parser=None, priority=PRIORITY_CONTENT, refresh=False, provider=None, task=None):
+    # Single entry point for text generation; identical requests are served from llm_cache.
+    # When a parser is given its result is returned, and responses it rejects are never cached.
+    # refresh skips the cache lookup; the fresh answer still replaces the cached one.
+    # provider names the backend (default TEXT_PROVIDER); task describes the request in structured form
+    # for providers that do not work from the prompt text, like the local template provider.
+    provider = get_text_provider(provider)
+    key = None
+    if llm_cache is not None and provider.cache_name:
+        key = llm_cache_key(prompt, language, has_image, desired_count, provider.cache_name)
+        if not refresh:
+            cached = llm_cache.get(key)
+            if cached is not None:
+                return parser(cached) if parser else cached
+    
+    try:
+        text = provider.generate(prompt, task, generation_config, priority)
+    except Exception as e:
+        fallback = get_text_provider(TEXT_PROVIDER_FALLBACK) if TEXT_PROVIDER_FALLBACK in TEXT_PROVIDERS else None
+        if fallback is None or fallback is provider:
+            raise
+        app.logger.warning(f"{provider.name} provider failed ({str(e)}), using {fallback.name}")
+        fallbacks.inc(kind="provider")
+        # Fallback answers are not cached, so the primary provider is asked again next time
+        text = fallback.generate(prompt, task, generation_config, priority)
+        key = None
+    result = parser(text) if parser else text
+    
+    if key is not None and text:
+        llm_cache.set(key, text)
+    return result
+
 def apply_gradient(slide, start_color, end_color):
     background = slide.background
     fill = background.fill
@@ -164,6 +1394,26 @@ def add_text_shadow(text_frame):
         for run in paragraph.runs:
             add_shadow_to_run(run)
 
+def build_outer_shadow():
+    outerShdw = OxmlElement('a:outerShdw')
+    outerShdw.set('blurRad', '40000')
+    outerShdw.set('dist', '20000')
+    outerShdw.set('dir', '5400000')
+    outerShdw.set('rotWithShape', '0')
+    
+    srgbClr = OxmlElement('a:srgbClr')
+    srgbClr.set('val', '323232')
+    
+    alpha = OxmlElement('a:alpha')
+    alpha.set('val', '50000')
+    srgbClr.append(alpha)
+    
+    outerShdw.append(srgbClr)
+    return outerShdw
+
+# Built once and deep-copied onto every run instead of constructing the elements per run
+OUTER_SHADOW_TEMPLATE = build_outer_shadow()
+
 def add_shadow_to_run(run):
     rPr = run._r.get_or_add_rPr()
     effectLst = rPr.find(qn('a:effectLst'))
@@ -171,23 +1421,8 @@ def add_shadow_to_run(run):
         effectLst = OxmlElement('a:effectLst')
         rPr.append(effectLst)
     
-    outerShdw = effectLst.find(qn('a:outerShdw'))
-    if outerShdw is None:
-        outerShdw = OxmlElement('a:outerShdw')
-        outerShdw.set('blurRad', '40000')
-        outerShdw.set('dist', '20000')
-        outerShdw.set('dir', '5400000')
-        outerShdw.set('rotWithShape', '0')
-        
-        srgbClr = OxmlElement('a:srgbClr')
-        srgbClr.set('val', '323232')
-        
-        alpha = OxmlElement('a:alpha')
-        alpha.set('val', '50000')
-        srgbClr.append(alpha)
-        
-        outerShdw.append(srgbClr)
-        effectLst.append(outerShdw)
+    if effectLst.find(qn('a:outerShdw')) is None:
+        effectLst.append(deepcopy(OUTER_SHADOW_TEMPLATE))
 
 def process_titles(text):
     try:
@@ -213,10 +1448,11 @@ def process_bullet_points(text):
         app.logger.exception("Error processing bullet points")
         return text
 
-def generate_slide_titles(content, language="en", desired_count=5):
-    try:
-        lang_name = "Hindi" if language == "hi" else "Telugu" if language == "te" else language.capitalize()
-        prompt = f"""Generate exactly {desired_count} unique and interesting slide titles for a presentation on '{content}' in {lang_name}.
+# Prompt builders and response post-processing are shared by the sync pipeline below and the
+# asyncio one in backend/asgi.py
+def slide_titles_prompt(content, language="en", desired_count=5):
+    lang_name = "Hindi" if language == "hi" else "Telugu" if language == "te" else language.capitalize()
+    return f"""Generate exactly {desired_count} unique and interesting slide titles for a presentation on '{content}' in {lang_name}.
         The titles should:
         - Be concise (3-6 words each)
         - Cover different aspects of the topic
@@ -224,130 +1460,521 @@ def generate_slide_titles(content, language="en", desired_count=5):
         - Be engaging and informative
         
         Format as a simple list with one title per line, no preamble or extra formatting."""
-        
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        titles_text = response.text.strip()
-        
-        titles = process_titles(titles_text)
-        
-        seen_titles = set()
-        unique_titles = []
-        for title in titles:
-            if title.lower() not in seen_titles:
-                unique_titles.append(title)
-                seen_titles.add(title.lower())
-        
-        while len(unique_titles) < desired_count:
-            index = len(unique_titles) + 1
-            aspects = ["Applications", "Benefits", "Challenges", "Future", "Implementation", 
-                       "History", "Case Studies", "Best Practices", "Technologies", "Impact"]
-            aspect = aspects[(index - 1) % len(aspects)]
-            new_title = f"{content} {aspect}"
-            if new_title.lower() not in seen_titles:
-                unique_titles.append(new_title)
-                seen_titles.add(new_title.lower())
-        
-        return unique_titles[:desired_count]
+
+def unique_slide_titles(titles_text, content, desired_count=5):
+    titles = process_titles(titles_text)
+    
+    seen_titles = set()
+    unique_titles = []
+    for title in titles:
+        if title.lower() not in seen_titles:
+            unique_titles.append(title)
+            seen_titles.add(title.lower())
+    
+    while len(unique_titles) < desired_count:
+        index = len(unique_titles) + 1
+        aspects = ["Applications", "Benefits", "Challenges", "Future", "Implementation", 
+                   "History", "Case Studies", "Best Practices", "Technologies", "Impact"]
+        aspect = aspects[(index - 1) % len(aspects)]
+        new_title = f"{content} {aspect}"
+        if new_title.lower() not in seen_titles:
+            unique_titles.append(new_title)
+            seen_titles.add(new_title.lower())
+    
+    return unique_titles[:desired_count]
+
+def fallback_slide_titles(content, desired_count=5):
+    fallback_titles = []
+    aspects = ["Overview", "Introduction", "Applications", "Benefits", "Challenges", 
+              "Future Trends", "Implementation", "Case Studies", "Best Practices", "Impact"]
+    for i in range(min(desired_count, len(aspects))):
+        fallback_titles.append(f"{content} {aspects[i]}")
+    return fallback_titles[:desired_count]
+
+def generate_slide_titles(content, language="en", desired_count=5, provider=None):
+    try:
+        titles_text = generate_text(slide_titles_prompt(content, language, desired_count), language,
+                                    desired_count=desired_count, priority=PRIORITY_TITLES, provider=provider,
+                                    task={"kind": "titles", "content": content, "count": desired_count})
+        return unique_slide_titles(titles_text, content, desired_count)
     except Exception as e:
         app.logger.exception(f"Failed to generate titles: {str(e)}")
-        fallback_titles = []
-        aspects = ["Overview", "Introduction", "Applications", "Benefits", "Challenges", 
-                  "Future Trends", "Implementation", "Case Studies", "Best Practices", "Impact"]
-        for i in range(min(desired_count, len(aspects))):
-            fallback_titles.append(f"{content} {aspects[i]}")
-        return fallback_titles[:desired_count]
-
-def generate_slide_content(slide_title, has_image=True, language="en"):
+        fallbacks.inc(kind="titles")
+        return fallback_slide_titles(content, desired_count)
+
+def slide_content_prompt(slide_title, has_image=True, language="en", context=None):
+    lang_name = "Hindi" if language == "hi" else "Telugu" if language == "te" else language.capitalize()
+    if has_image:
+        prompt = f"Generate two concise paragraphs (max 50 words each) for '{slide_title}' in {lang_name}, no preamble or labels."
+    else:
+        prompt = f"Generate six concise bullet points (max 25 words each) for '{slide_title}' in {lang_name}. Use '-' as bullet marker, no numbering."
+    if context:
+        prompt += f" Base it on this source document summary:\n\n{context}"
+    return prompt
+
+def generate_slide_content(slide_title, has_image=True, language="en", context=None, refresh=False, fallback=True, provider=None):
     try:
-        lang_name = "Hindi" if language == "hi" else "Telugu" if language == "te" else language.capitalize()
-        if has_image:
-            prompt = f"Generate two concise paragraphs (max 50 words each) for '{slide_title}' in {lang_name}, no preamble or labels."
-            max_tokens = 150
-        else:
-            prompt = f"Generate six concise bullet points (max 25 words each) for '{slide_title}' in {lang_name}. Use '-' as bullet marker, no numbering."
-            max_tokens = 300
-        
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        content = response.text.strip()
+        content = generate_text(slide_content_prompt(slide_title, has_image, language, context), language,
+                                has_image=has_image, refresh=refresh, provider=provider,
+                                task={"kind": "content", "title": slide_title, "has_image": has_image, "context": context})
         
         if not has_image:
             content = process_bullet_points(content)
         return content
     except Exception as e:
+        if not fallback:
+            raise
         app.logger.exception(f"Failed to generate content for '{slide_title}': {str(e)}")
+        fallbacks.inc(kind="content")
         return f"Content generation failed: {str(e)}"
 
-def generate_image(prompt, language="en"):
+def iter_text_chunks(text_file, chunk_chars, max_bytes=TEXT_MAX_BYTES):
+    # Decodes the upload incrementally and yields pieces of at most chunk_chars characters,
+    # cut at a paragraph, sentence or word boundary when one is available
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buffer = ""
+    read_bytes = 0
+    while True:
+        data = text_file.read(TEXT_READ_BYTES)
+        if data and read_bytes + len(data) > max_bytes:
+            app.logger.warning(f"Uploaded text truncated at {max_bytes} bytes")
+            data = data[:max_bytes - read_bytes]
+        read_bytes += len(data)
+        buffer += decoder.decode(data, final=not data or read_bytes >= max_bytes)
+        while len(buffer) >= chunk_chars:
+            window = buffer[:chunk_chars]
+            cut = -1
+            for separator in ("\n\n", ". ", "\n", " "):
+                cut = window.rfind(separator)
+                if cut > chunk_chars // 2:
+                    cut += len(separator)
+                    break
+            if cut <= chunk_chars // 2:
+                cut = chunk_chars
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+        if not data or read_bytes >= max_bytes:
+            break
+    if buffer.strip():
+        yield buffer
+
+def summarize_chunk(text, language="en", partial=True, provider=None):
+    lang_name = "Hindi" if language == "hi" else "Telugu" if language == "te" else language.capitalize()
+    if partial:
+        prompt = (f"Summarize this part of a document in at most {SUMMARY_WORDS} words in {lang_name}, "
+                  f"keeping key facts, names and figures. No preamble.\n\n{text}")
+    else:
+        prompt = (f"Combine these partial summaries of one document into a single summary of at most "
+                  f"{SUMMARY_WORDS} words in {lang_name}. No preamble.\n\n{text}")
+    try:
+        return generate_text(prompt, language, priority=PRIORITY_TITLES, provider=provider,
+                             task={"kind": "summary", "text": text})
+    except Exception as e:
+        app.logger.exception(f"Summarization failed, keeping the leading text: {str(e)}")
+        fallbacks.inc(kind="summary")
+        return " ".join(text.split()[:SUMMARY_WORDS])
+
+def summarize_text(chunks, language="en", max_workers=None, provider=None):
+    # Map-reduce: chunks are summarized a few at a time and the partial summaries are folded
+    # whenever SUMMARY_FANIN of them pile up, so memory stays bounded for any input size
+    workers = max(1, max_workers or GENERATION_CONCURRENCY)
+    summaries = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def summarize_batch(batch):
+            futures = [executor.submit(contextvars.copy_context().run, summarize_chunk, chunk, language, True, provider)
+                       for chunk in batch]
+            return [future.result() for future in futures]
+        
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) < workers:
+                continue
+            summaries.extend(summarize_batch(batch))
+            batch = []
+            if len(summaries) >= SUMMARY_FANIN:
+                summaries = [summarize_chunk("\n\n".join(summaries), language, partial=False, provider=provider)]
+        if batch:
+            summaries.extend(summarize_batch(batch))
+    if len(summaries) == 1:
+        return summaries[0]
+    return summarize_chunk("\n\n".join(summaries), language, partial=False, provider=provider)
+
+def ingest_text_file(text_file, language="en", summarize=False, max_workers=None, provider=None):
+    # Returns (content, digested). Short documents are used verbatim; anything over
+    # TEXT_DIRECT_TOKENS, or any document when summarize is set, is reduced to a digest.
+    direct_chars = TEXT_DIRECT_TOKENS * CHARS_PER_TOKEN
+    chunks = iter_text_chunks(text_file, TEXT_CHUNK_TOKENS * CHARS_PER_TOKEN)
+    head = []
+    head_chars = 0
+    for chunk in chunks:
+        head.append(chunk)
+        head_chars += len(chunk)
+        if head_chars > direct_chars:
+            break
+    else:
+        text = "".join(head)
+        if not summarize or not text.strip():
+            return text, False
+    
+    def all_chunks():
+        yield from head
+        yield from chunks
+    
+    return summarize_text(all_chunks(), language, max_workers, provider), True
+
+def parse_outline(text, desired_count=5, has_image=True):
+    # Strict parser for the batched outline response: {"slides": [{"title": ..., "content": ...}]}.
+    # Raises ValueError when the payload is unusable; a slide with a missing body gets content None.
+    text = text.strip()
+    fence = re.match(r'^```(?:json)?\s*(.*?)\s*```$', text, re.DOTALL)
+    if fence:
+        text = fence.group(1)
+    data = json.loads(text)
+    if not isinstance(data, dict) or not isinstance(data.get("slides"), list):
+        raise ValueError("Outline response has no 'slides' list")
+    
+    titles = []
+    contents = []
+    seen_titles = set()
+    for item in data["slides"][:desired_count]:
+        if not isinstance(item, dict) or not isinstance(item.get("title"), str):
+            raise ValueError("Outline slide has no title")
+        normalized = process_titles(item["title"])
+        if not normalized or normalized[0].lower() in seen_titles:
+            continue
+        title = normalized[0]
+        seen_titles.add(title.lower())
+        
+        body = item.get("content")
+        if isinstance(body, list):
+            body = '\n'.join(str(line) for line in body)
+        if isinstance(body, str) and body.strip():
+            body = body.strip() if has_image else process_bullet_points(body)
+        else:
+            body = None
+        titles.append(title)
+        contents.append(body)
+    
+    if not titles:
+        raise ValueError("Outline response has no usable slides")
+    return titles, contents
+
+def outline_prompt(content, language="en", desired_count=5, has_image=True):
+    lang_name = "Hindi" if language == "hi" else "Telugu" if language == "te" else language.capitalize()
+    if has_image:
+        body_spec = "two concise paragraphs (max 50 words each) separated by a blank line"
+    else:
+        body_spec = "six concise bullet points (max 25 words each), one per line, using '-' as bullet marker, no numbering"
+    return f"""Create an outline for a presentation on '{content}' in {lang_name} with exactly {desired_count} slides.
+    For each slide provide:
+    - "title": a unique, engaging slide title (3-6 words, no numbering)
+    - "content": {body_spec}, no preamble or labels
+    
+    Respond with JSON only, in this exact shape: {{"slides": [{{"title": "...", "content": "..."}}]}}"""
+
+def generate_outline(content, language="en", desired_count=5, has_image=True, provider=None):
+    return generate_text(outline_prompt(content, language, desired_count, has_image), language, has_image, desired_count,
+                         generation_config={"response_mime_type": "application/json"},
+                         parser=lambda text: parse_outline(text, desired_count, has_image),
+                         priority=PRIORITY_TITLES, provider=provider, task={"kind": "outline"})
+
+def optimize_image(image_data):
+    # Resizes to IMAGE_WIDTH_INCHES at IMAGE_DPI and re-encodes without metadata: JPEG for opaque
+    # images, optimized PNG only when there is real transparency (PowerPoint cannot embed WebP).
+    # The encoders are deterministic, so the same source image always becomes the same bytes and
+    # python-pptx stores repeats as a single media part. Unreadable or larger results keep the input.
+    from PIL import Image
     try:
+        with Image.open(BytesIO(image_data)) as source:
+            image = source.convert("RGBA") if source.mode in ("RGBA", "LA", "PA", "P") else source.convert("RGB")
+        target_width = int(IMAGE_WIDTH_INCHES * IMAGE_DPI)
+        if image.width > target_width:
+            image = image.resize((target_width, round(image.height * target_width / image.width)), Image.LANCZOS)
+        if image.mode == "RGBA" and image.getchannel("A").getextrema()[0] == 255:
+            image = image.convert("RGB")
+        image.info.clear()
+        output = BytesIO()
+        if image.mode == "RGBA":
+            image.save(output, "PNG", optimize=True)
+        else:
+            image.save(output, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+    except Exception as e:
+        app.logger.warning(f"Image optimization failed, embedding the original: {str(e)}")
+        return image_data
+    optimized = output.getvalue()
+    return optimized if len(optimized) < len(image_data) else image_data
+
+def image_request(prompt, language="en"):
+    # Returns (api_url, payload) for the Stability text-to-image call
+    api_url = f"{STABILITY_API_HOST}/v1/generation/stable-diffusion-xl-1024-v1-0/text-to-image"
+    
+    # Create a generic prompt that doesn't include the potentially non-English text
+    if language != "en":
+        # For non-English, use a generic prompt based on the slide context
+        # Extract the topic by taking the first word or use "presentation" as fallback
+        topic_words = prompt.split()
+        topic = topic_words[0] if topic_words else "presentation"
+        generic_prompt = f"Professional illustration for {topic} presentation"
+    else:
+        # For English, we can use the full prompt
+        generic_prompt = prompt
+        
+    payload = {
+        "text_prompts": [{"text": f"{generic_prompt}, professional high-quality illustration"}],
+        "cfg_scale": 7,
+        "height": 1024,
+        "width": 1024,
+        "samples": 1,
+        "steps": 30,
+    }
+    return api_url, payload
+
+def store_image_response(data, cache_key):
+    # Decodes, optimizes and caches the Stability response; None when it carries no image
+    if "artifacts" in data and len(data["artifacts"]) > 0:
+        image_b64 = data["artifacts"][0]["base64"]
+        with span("image_optimize"):
+            image_data = optimize_image(base64.b64decode(image_b64))
+        
+        if image_cache is not None:
+            image_cache.put(cache_key, image_data)
+        
+        image_stream = BytesIO(image_data)
+        image_stream.seek(0)
+        
+        return image_stream
+    else:
+        return None
+
+def generate_image(prompt, language="en", refresh=False):
+    try:
+        api_url, payload = image_request(prompt, language)
+        
+        # Cache hits are returned as file paths so add_picture streams them straight from disk
+        cache_key = image_cache_key(api_url, payload)
+        if image_cache is not None and not refresh:
+            cached_path = image_cache.get(cache_key)
+            if cached_path:
+                return cached_path
+        
         stability_api_key = os.environ.get('STABILITY_API_KEY')
         
         if not stability_api_key:
             app.logger.error("STABILITY_API_KEY is not set in the environment!")
             return None
         
-        api_url = "https://api.stability.ai/v1/generation/stable-diffusion-xl-1024-v1-0/text-to-image"
         headers = {"Authorization": f"Bearer {stability_api_key}", "Content-Type": "application/json"}
         
-        # Create a generic prompt that doesn't include the potentially non-English text
-        if language != "en":
-            # For non-English, use a generic prompt based on the slide context
-            # Extract the topic by taking the first word or use "presentation" as fallback
-            topic_words = prompt.split()
-            topic = topic_words[0] if topic_words else "presentation"
-            generic_prompt = f"Professional illustration for {topic} presentation"
-        else:
-            # For English, we can use the full prompt
-            generic_prompt = prompt
+        data = post_json(api_url, payload, headers, stability_circuit, stability_limiter, PRIORITY_IMAGE)
+        return store_image_response(data, cache_key)
             
-        payload = {
-            "text_prompts": [{"text": f"{generic_prompt}, professional high-quality illustration"}],
-            "cfg_scale": 7,
-            "height": 1024,
-            "width": 1024,
-            "samples": 1,
-            "steps": 30,
-        }
-        
-        response = requests.post(api_url, headers=headers, json=payload)
-        response.raise_for_status()
+    except Exception as e:
+        app.logger.exception(f"Error generating image: {str(e)}")
+        return None
+
+def slide_image_prompt(title, content_text):
+    return f"{title} related to {content_text}"[:IMAGE_PROMPT_MAX_CHARS]
+
+def generate_slide_assets(slide_titles, include_images=True, language="en", max_workers=None, slide_contents=None, progress=None, context=None, provider=None):
+    # Fan out the per-slide content and image calls; results come back in slide order.
+    # The image prompt depends on the slide text, so each slide is a content -> image chain.
+    # Bodies already present in slide_contents (e.g. from a batched outline) skip the LLM call.
+    # progress(event, data) is called from the worker threads as each piece completes.
+    def build_slide_assets(index, title):
+        content_text = None
+        if slide_contents and index < len(slide_contents):
+            content_text = slide_contents[index]
+        if content_text is None:
+            with span("slide_content"):
+                content_text = generate_slide_content(title, include_images, language, context, provider=provider)
+        if progress:
+            progress("slide_text", {"index": index, "title": title, "content": content_text})
+        image_stream = None
+        if include_images and (index % 2 == 0):
+            with span("slide_image"):
+                image_stream = generate_image(slide_image_prompt(title, content_text), language)
+            if not image_stream:
+                fallbacks.inc(kind="image")
+            if progress:
+                progress("slide_image", {"index": index, "has_image": bool(image_stream)})
+        return content_text, image_stream
+
+    workers = max(1, min(max_workers or GENERATION_CONCURRENCY, len(slide_titles)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Each task runs in a copy of the caller's context so its spans land in the request trace
+        futures = [executor.submit(contextvars.copy_context().run, build_slide_assets, i, title)
+                   for i, title in enumerate(slide_titles)]
+        return [future.result() for future in futures]
+
+def lttb_indices(x, y, threshold):
+    # Largest-Triangle-Three-Buckets over x-sorted points: keeps the first and last points and, from
+    # each bucket in between, the point spanning the largest triangle with the last kept point and the
+    # next bucket's mean. Buckets cover equal x ranges so stretches that were already thinned out by an
+    # earlier pass are not squeezed together with denser ones.
+    import numpy as np
+    n = len(x)
+    if n <= threshold or threshold < 3:
+        return np.arange(n)
+    inner = np.searchsorted(x, np.linspace(x[1], x[n - 2], threshold - 1)[1:-1])
+    edges = np.unique(np.concatenate(([1], np.clip(inner, 1, n - 1), [n - 1, n])))
+    selected = [0]
+    previous = 0
+    for bucket in range(len(edges) - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+        area = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected.append(previous)
+    selected.append(n - 1)
+    return np.array(selected)
+
+def downsample_points(frame, limit):
+    # frame has an "x" column followed by the series columns; the first series drives the selection
+    import numpy as np
+    if len(frame) <= limit:
+        return frame
+    x = frame["x"].to_numpy(dtype=float)
+    y = frame.iloc[:, 1].to_numpy(dtype=float)
+    if np.isnan(y).all():
+        y = np.zeros_like(y)
+    else:
+        y = np.where(np.isnan(y), np.nanmean(y), y)
+    return frame.iloc[lttb_indices(x, y, limit)]
+
+def top_categories(frame, limit):
+    # Keeps the limit - 1 largest categories in their original order and folds the rest into "Other"
+    import pandas as pd
+    if len(frame) <= limit:
+        return frame
+    totals = frame.abs().sum(axis=1)
+    kept = frame.index.isin(totals.nlargest(limit - 1).index)
+    other = frame[~kept].sum(min_count=1).to_frame("Other").T
+    return pd.concat([frame[kept], other])
+
+def merge_categories(frame):
+    # Sums duplicate categories, keeping each at its first position
+    grouped = frame.groupby(level=0, sort=False)
+    merged = grouped.sum(min_count=1)
+    if "x" in frame.columns:
+        merged["x"] = grouped["x"].first()
+    return merged
+
+def read_chart_data(csv_file, chart_type="bar", max_points=None):
+    # Streams the CSV in chunks, reading only the category column and up to CHART_MAX_SERIES numeric
+    # columns, so memory and chart size stay flat however many rows the upload has.
+    # pandas is only imported once a CSV actually arrives.
+    import numpy as np
+    import pandas as pd
+    try:
+        csv_file.seek(0)
+        sample = pd.read_csv(csv_file, nrows=CHART_SAMPLE_ROWS, dtype=str)
+        if sample.shape[1] < 2:
+            raise ValueError("CSV needs a category column and at least one value column")
+        category_column = sample.columns[0]
+        value_columns = [
+            column for column in sample.columns[1:]
+            if pd.to_numeric(sample[column], errors='coerce').notna().mean() >= 0.5
+        ][:CHART_MAX_SERIES]
+        if not value_columns:
+            raise ValueError("CSV has no numeric value column")
+        # Scatter plots use the first column as x when it is numeric, the row number otherwise
+        numeric_x = chart_type == "scatter" and pd.to_numeric(sample[category_column], errors='coerce').notna().mean() >= 0.5
         
-        data = response.json()
+        if chart_type in ("line", "scatter"):
+            limit = max_points or CHART_MAX_POINTS
+        else:
+            limit = max_points or CHART_MAX_CATEGORIES
         
-        if "artifacts" in data and len(data["artifacts"]) > 0:
-            image_b64 = data["artifacts"][0]["base64"]
-            image_data = base64.b64decode(image_b64)
-            
-            image_stream = BytesIO(image_data)
-            image_stream.seek(0)
+        csv_file.seek(0)
+        reader = pd.read_csv(csv_file, usecols=[category_column] + value_columns, dtype=str,
+                             chunksize=CHART_CSV_CHUNK_ROWS)
+        frame = None
+        position = 0
+        for chunk in reader:
+            values = chunk[value_columns].apply(pd.to_numeric, errors='coerce')
+            if chart_type == "scatter":
+                if numeric_x:
+                    x = pd.to_numeric(chunk[category_column], errors='coerce')
+                else:
+                    x = pd.Series(np.arange(position, position + len(chunk)), index=chunk.index)
+                position += len(chunk)
+                part = values[x.notna()]
+                part.insert(0, "x", x[x.notna()])
+                part.index = part["x"].to_numpy()
+            else:
+                part = values.groupby(chunk[category_column].fillna(""), sort=False).sum(min_count=1)
+                if chart_type == "line":
+                    part.insert(0, "x", np.arange(position, position + len(part)))
+                    position += len(part)
             
-            return image_stream
+            frame = part if frame is None else pd.concat([frame, part])
+            if chart_type == "scatter":
+                if len(frame) > 4 * limit:
+                    frame = downsample_points(frame.sort_values("x", kind="stable"), limit)
+            else:
+                frame = merge_categories(frame)
+                if chart_type == "line" and len(frame) > 4 * limit:
+                    frame = downsample_points(frame, limit)
+        
+        if frame is None or frame.empty:
+            raise ValueError("CSV has no data rows")
+        if chart_type == "scatter":
+            frame = downsample_points(frame.sort_values("x", kind="stable"), limit)
+        elif chart_type == "line":
+            frame = downsample_points(frame, limit)
         else:
-            return None
-            
+            frame = top_categories(frame, limit)
+        frame = frame.drop(columns="x", errors="ignore")
+        
+        if chart_type == "scatter":
+            categories = [float(value) for value in frame.index]
+        else:
+            categories = [str(value) for value in frame.index]
+        return {
+            "categories": categories,
+            "series": [
+                (str(name), [None if np.isnan(value) else float(value) for value in frame[name].to_numpy(dtype=float)])
+                for name in value_columns
+            ],
+        }
     except Exception as e:
-        app.logger.exception(f"Error generating image: {str(e)}")
+        app.logger.exception(f"Error reading chart data: {str(e)}")
         return None
 
-def generate_chart(slide, csv_file, chart_type="bar", language="en"):
+def chart_title_text(language="en"):
+    return "डेटा अवलोकन" if language == "hi" else "డేటా అవలోకనం" if language == "te" else "Data Overview"
+
+def generate_chart(slide, chart_data, chart_type="bar", language="en"):
+    from pptx.chart.data import CategoryChartData, XyChartData
     try:
-        # Create a temporary copy of the file to work with
-        csv_file.seek(0)
-        df = pd.read_csv(csv_file)
-        
-        chart_data = CategoryChartData()
-        chart_data.categories = df.iloc[:, 0].tolist()
-        chart_data.add_series('Data', df.iloc[:, 1].tolist())
+        if chart_type == "scatter":
+            # Scatter plots need x/y pairs; CategoryChartData has no x values
+            plot_data = XyChartData()
+            for series_name, values in chart_data["series"]:
+                series = plot_data.add_series(series_name)
+                for x, y in zip(chart_data["categories"], values):
+                    if y is not None:
+                        series.add_data_point(x, y)
+        else:
+            plot_data = CategoryChartData()
+            plot_data.categories = chart_data["categories"]
+            for series_name, values in chart_data["series"]:
+                plot_data.add_series(series_name, values)
         chart_type_enum = CHART_TYPES.get(chart_type, XL_CHART_TYPE.COLUMN_CLUSTERED)
         chart = slide.shapes.add_chart(
             chart_type_enum,
             Inches(5.5), Inches(1.2),
             Inches(4), Inches(3),
-            chart_data
+            plot_data
         ).chart
+        if len(chart_data["series"]) > 1:
+            chart.has_legend = True
         chart.has_title = True
-        chart.chart_title.text_frame.text = "डेटा अवलोकन" if language == "hi" else "డేటా అవలోకనం" if language == "te" else "Data Overview"
+        chart.chart_title.text_frame.text = chart_title_text(language)
         chart.chart_title.text_frame.paragraphs[0].font.size = Pt(14)
         chart.chart_title.text_frame.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else "Arial"
     except Exception as e:
@@ -530,178 +2157,678 @@ def apply_bullet_styling(paragraph, bullet_style, theme_color):
     except:
         paragraph.bullet = True
 
-def create_presentation(topic, text_file=None, csv_file=None, theme="corporate", variant="professional", language="en", include_images=True, summarize=False, chart_type="bar", export_format="pptx", slide_count=5):
-    try:
-        prs = Presentation()
-        selected_theme = THEMES.get(theme, THEMES["corporate"])
-        variant_info = selected_theme["variants"].get(variant, selected_theme["variants"]["professional"])
-        
-        prs.slide_width = Inches(13.33)
-        prs.slide_height = Inches(7.5)
+slide_decorations = {}
+slide_decorations_lock = threading.Lock()
 
-        content = topic
-        if text_file:
-            content = text_file.read().decode('utf-8')
+def build_slide_decoration(selected_theme, variant_info, is_title_slide):
+    # Renders the background and accent shapes once on a scratch slide and keeps their XML
+    scratch = Presentation()
+    slide = scratch.slides.add_slide(scratch.slide_layouts[6])
+    apply_gradient(slide, selected_theme["gradient_start"], selected_theme["gradient_end"])
+    add_design_elements(slide, selected_theme, variant_info)
+    apply_variant_styling(slide, selected_theme, variant_info, is_title_slide=is_title_slide)
+    
+    cSld = slide._element.cSld
+    shapes = [shape._element for shape in slide.shapes]
+    return deepcopy(cSld.bg), [deepcopy(shape) for shape in shapes]
 
-        desired_content_slides = min(int(slide_count), 10) - 1
-        slide_titles = generate_slide_titles(content, language, desired_content_slides + 1)
+def decorate_slide(slide, theme, variant, is_title_slide=False):
+    # Same result as apply_gradient + add_design_elements + apply_variant_styling, but the
+    # (theme, variant, is_title_slide) fragments are built once per process and cloned afterwards
+    theme = theme if theme in THEMES else "corporate"
+    selected_theme = THEMES[theme]
+    variant = variant if variant in selected_theme["variants"] else "professional"
+    key = (theme, variant, is_title_slide)
+    
+    decoration = slide_decorations.get(key)
+    if decoration is None:
+        with slide_decorations_lock:
+            decoration = slide_decorations.get(key)
+            if decoration is None:
+                decoration = build_slide_decoration(selected_theme, selected_theme["variants"][variant], is_title_slide)
+                slide_decorations[key] = decoration
+    
+    background, shapes = decoration
+    cSld = slide._element.cSld
+    cSld.insert(0, deepcopy(background))
+    for shape in shapes:
+        cSld.spTree.append(deepcopy(shape))
+
+def generate_deck(topic, text_file=None, csv_file=None, language="en", include_images=True, chart_type="bar", slide_count=5, max_workers=None, batch_outline=None, progress=None, summarize=False, provider=None):
+    # Runs every LLM/image call and returns the in-memory slide model that both renderers consume
+    content = topic
+    context = None
+    if text_file:
+        with span("ingest"):
+            content, digested = ingest_text_file(text_file, language, summarize, max_workers, provider)
+        # The uploaded document (or its digest) also grounds each slide body
+        context = content
+        if progress and digested:
+            progress("digest", {"words": len(content.split())})
+
+    desired_content_slides = min(int(slide_count), 10) - 1
+    if batch_outline is None:
+        batch_outline = BATCH_OUTLINE
+    
+    slide_titles = None
+    slide_contents = None
+    # Topic-only decks can start from the outline of an earlier, near-identical topic
+    draft = None
+    if similar_topics is not None and topic and not text_file:
+        with span("similar_lookup"):
+            draft = similar_topics.lookup(topic, language, include_images, desired_content_slides + 1)
+        if draft:
+            slide_titles, slide_contents = draft["titles"], draft["contents"]
+            if progress:
+                progress("draft", {"topic": draft["topic"], "similarity": round(draft["similarity"], 3)})
+    with track_fallbacks() as taken:
+        if batch_outline and not slide_titles and get_text_provider(provider).supports_outline:
+            try:
+                with span("outline"):
+                    slide_titles, slide_contents = generate_outline(content, language, desired_content_slides + 1, include_images, provider)
+            except Exception as e:
+                app.logger.exception(f"Batched outline failed, falling back to per-slide generation: {str(e)}")
+                fallbacks.inc(kind="outline")
+        if not slide_titles:
+            with span("titles"):
+                slide_titles = generate_slide_titles(content, language, desired_content_slides + 1, provider)
+        
+        pad_slide_titles(slide_titles, topic, desired_content_slides + 1)
         
-        while len(slide_titles) < desired_content_slides + 1:
-            default_aspects = ["Overview", "Applications", "Benefits", "Challenges", "Future Trends", 
-                            "Implementation", "Case Studies", "Best Practices", "Impact", "Technologies"]
-            index = len(slide_titles)
-            new_title = f"{topic} {default_aspects[index % len(default_aspects)]}"
-            slide_titles.append(new_title)
+        if progress:
+            progress("titles", {"titles": slide_titles})
         
-        title_slide = prs.slides.add_slide(prs.slide_layouts[6])
-        apply_gradient(title_slide, selected_theme["gradient_start"], selected_theme["gradient_end"])
+        slide_assets = generate_slide_assets(slide_titles, include_images, language, max_workers, slide_contents, progress, context, provider)
+    # Only outlines whose titles and bodies all came from the requested provider are worth reusing
+    if similar_topics is not None and topic and not text_file and not draft and not SIMILAR_TOPIC_FALLBACKS.intersection(taken):
+        similar_topics.add(topic, language, include_images, slide_titles,
+                           [content_text for content_text, _ in slide_assets])
+    
+    chart = None
+    if csv_file:
+        with span("chart_data"):
+            chart = {"chart_type": chart_type, "data": read_chart_data(csv_file, chart_type)}
+        if progress:
+            progress("chart", {"chart_type": chart_type})
+    
+    return deck_model(topic, language, include_images, context, provider, slide_titles, slide_assets, chart)
+
+def pad_slide_titles(slide_titles, topic, count):
+    while len(slide_titles) < count:
+        default_aspects = ["Overview", "Applications", "Benefits", "Challenges", "Future Trends", 
+                        "Implementation", "Case Studies", "Best Practices", "Impact", "Technologies"]
+        index = len(slide_titles)
+        new_title = f"{topic} {default_aspects[index % len(default_aspects)]}"
+        slide_titles.append(new_title)
+    return slide_titles
+
+def deck_model(topic, language, include_images, context, provider, slide_titles, slide_assets, chart):
+    return {
+        "topic": topic,
+        "language": language,
+        "date": time.strftime('%Y-%m-%d'),
+        "include_images": include_images,
+        "context": context,
+        "provider": provider,
+        "slides": [
+            {"title": title, "content": content_text, "image": image_stream}
+            for title, (content_text, image_stream) in zip(slide_titles, slide_assets)
+        ],
+        "chart": chart,
+    }
+
+def chart_slide_text(language="en"):
+    chart_title = "Data Analysis" if language == "en" else "डेटा विश्लेषण" if language == "hi" else "డేటా విశ్లేషణ"
+    chart_explanation = "This chart visualizes the key data points related to our topic. The data shows trends and patterns that support our analysis."
+    if language == "hi":
+        chart_explanation = "यह चार्ट हमारे विषय से संबंधित प्रमुख डेटा बिंदुओं को दर्शाता है। डेटा ऐसे रुझान और पैटर्न दिखाता है जो हमारे विश्लेषण का समर्थन करते हैं।"
+    elif language == "te":
+        chart_explanation = "ఈ చార్ట్ మన అంశానికి సంబంధించిన కీలక డేటా పాయింట్లను చూపిస్తుంది. డేటా మన విశ్లేషణకు మద్దతు ఇచ్చే ధోరణులు మరియు నమూనాలను చూపిస్తుంది."
+    return chart_title, chart_explanation
+
+def content_paragraphs(content_text):
+    # Bullet content becomes one paragraph per bullet, prose one paragraph per line
+    if content_text.startswith('-'):
+        return [line.lstrip('- ') for line in content_text.split('\n')]
+    return [line for line in content_text.split('\n') if line.strip()]
+
+def render_pptx(deck, theme="corporate", variant="professional"):
+    prs = Presentation()
+    selected_theme = THEMES.get(theme, THEMES["corporate"])
+    variant_info = selected_theme["variants"].get(variant, selected_theme["variants"]["professional"])
+    language = deck["language"]
+    
+    prs.slide_width = Inches(13.33)
+    prs.slide_height = Inches(7.5)
+    
+    title_slide = prs.slides.add_slide(prs.slide_layouts[6])
+    decorate_slide(title_slide, theme, variant, is_title_slide=True)
+    
+    title_shape = title_slide.shapes.add_textbox(
+        Inches(1.0), Inches(2.5), Inches(10.0), Inches(1.5))
+    title_tf = title_shape.text_frame
+    title_tf.text = deck["slides"][0]["title"]
+    title_tf.paragraphs[0].font.size = TITLE_FONT_SIZE
+    title_tf.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
+    title_tf.paragraphs[0].font.color.rgb = selected_theme["title_color"]
+    title_tf.paragraphs[0].font.bold = True
+    title_tf.paragraphs[0].alignment = PP_ALIGN.CENTER
+    
+    if selected_theme["shadow"]:
+        add_text_shadow(title_tf)
         
-        add_design_elements(title_slide, selected_theme, variant_info)
-        apply_variant_styling(title_slide, selected_theme, variant_info, is_title_slide=True)
+    subtitle_shape = title_slide.shapes.add_textbox(
+        Inches(2.0), Inches(4.0), Inches(8.0), Inches(1.0))
+    subtitle_tf = subtitle_shape.text_frame
+    subtitle_tf.text = "Powered by AI"
+    subtitle_tf.paragraphs[0].font.size = Pt(24)
+    subtitle_tf.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
+    subtitle_tf.paragraphs[0].font.color.rgb = selected_theme["text_color"]
+    subtitle_tf.paragraphs[0].alignment = PP_ALIGN.CENTER
+    
+    for slide_model in deck["slides"]:
+        title = slide_model["title"]
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        decorate_slide(slide, theme, variant)
         
-        title_shape = title_slide.shapes.add_textbox(
-            Inches(1.0), Inches(2.5), Inches(10.0), Inches(1.5))
+        title_shape = slide.shapes.add_textbox(
+            Inches(0.5), Inches(0.5), Inches(11.0), Inches(0.8))
         title_tf = title_shape.text_frame
-        title_tf.text = slide_titles[0]
+        title_tf.text = title
         title_tf.paragraphs[0].font.size = TITLE_FONT_SIZE
         title_tf.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
         title_tf.paragraphs[0].font.color.rgb = selected_theme["title_color"]
         title_tf.paragraphs[0].font.bold = True
-        title_tf.paragraphs[0].alignment = PP_ALIGN.CENTER
         
-        if selected_theme["shadow"]:
-            add_text_shadow(title_tf)
-            
-        subtitle_shape = title_slide.shapes.add_textbox(
-            Inches(2.0), Inches(4.0), Inches(8.0), Inches(1.0))
-        subtitle_tf = subtitle_shape.text_frame
-        subtitle_tf.text = "Powered by AI"
-        subtitle_tf.paragraphs[0].font.size = Pt(24)
-        subtitle_tf.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
-        subtitle_tf.paragraphs[0].font.color.rgb = selected_theme["text_color"]
-        subtitle_tf.paragraphs[0].alignment = PP_ALIGN.CENTER
-        
-        for i, title in enumerate(slide_titles):
-            slide = prs.slides.add_slide(prs.slide_layouts[6])
-            apply_gradient(slide, selected_theme["gradient_start"], selected_theme["gradient_end"])
-            
-            add_design_elements(slide, selected_theme, variant_info)
-            apply_variant_styling(slide, selected_theme, variant_info)
-            
-            title_shape = slide.shapes.add_textbox(
-                Inches(0.5), Inches(0.5), Inches(11.0), Inches(0.8))
-            title_tf = title_shape.text_frame
-            title_tf.text = title
-            title_tf.paragraphs[0].font.size = TITLE_FONT_SIZE
-            title_tf.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
-            title_tf.paragraphs[0].font.color.rgb = selected_theme["title_color"]
-            title_tf.paragraphs[0].font.bold = True
-            
-            content_text = generate_slide_content(title, include_images, language)
-            
-            if include_images and (i % 2 == 0):
-                textbox = slide.shapes.add_textbox(
-                    Inches(0.5), Inches(1.5), Inches(5.75), Inches(5.0))
-            else:
-                textbox = slide.shapes.add_textbox(
-                    Inches(0.7), Inches(1.5), Inches(11.0), Inches(5.0))
-            
-            tf = textbox.text_frame
-            tf.word_wrap = True
-            tf.text = content_text
-            
-            if content_text.startswith('-'):
-                tf.text = ""
-                lines = content_text.split('\n')
-                for line_idx, line in enumerate(lines):
-                    p = tf.add_paragraph()
-                    p.text = line.lstrip('- ')
-                    p.level = 0
-                    p.font.size = CONTENT_FONT_SIZE
-                    p.font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
-                    p.font.color.rgb = selected_theme["text_color"]
-                    
-                    bullet_style = variant_info.get("bullet_style", "square")
-                    apply_bullet_styling(p, bullet_style, selected_theme["accent_color"])
-            else:
-                for paragraph in tf.paragraphs:
-                    paragraph.font.size = CONTENT_FONT_SIZE
-                    paragraph.font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
-                    paragraph.font.color.rgb = selected_theme["text_color"]
-                    paragraph.space_after = Pt(12)
-            
-            if selected_theme["shadow"]:
-                add_text_shadow(tf)
-            
-            if include_images and (i % 2 == 0):
-                image_stream = generate_image(f"{title} related to {content_text}", language)
-                if image_stream:
-                    slide.shapes.add_picture(image_stream, Inches(7.0), Inches(1.5), width=Inches(5.5))
-                else:
-                    textbox.width = Inches(11.0)
+        content_text = slide_model["content"]
+        image_stream = slide_model["image"]
+        if isinstance(image_stream, BytesIO):
+            image_stream.seek(0)
         
-        # Add chart slide if CSV file is provided
-        if csv_file:
-            chart_slide = prs.slides.add_slide(prs.slide_layouts[6])
-            apply_gradient(chart_slide, selected_theme["gradient_start"], selected_theme["gradient_end"])
-            
-            add_design_elements(chart_slide, selected_theme, variant_info)
-            apply_variant_styling(chart_slide, selected_theme, variant_info)
-            
-            title_shape = chart_slide.shapes.add_textbox(
-                Inches(0.5), Inches(0.5), Inches(11.0), Inches(0.8))
-            title_tf = title_shape.text_frame
-            chart_title = "Data Analysis" if language == "en" else "डेटा विश्लेषण" if language == "hi" else "డేటా విశ్లేషణ"
-            title_tf.text = chart_title
-            title_tf.paragraphs[0].font.size = TITLE_FONT_SIZE
-            title_tf.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
-            title_tf.paragraphs[0].font.color.rgb = selected_theme["title_color"]
-            title_tf.paragraphs[0].font.bold = True
-            
-            # Left side text explanation
-            textbox = chart_slide.shapes.add_textbox(
-                Inches(0.7), Inches(1.5), Inches(4.0), Inches(5.0))
-            tf = textbox.text_frame
-            tf.word_wrap = True
-            
-            chart_explanation = "This chart visualizes the key data points related to our topic. The data shows trends and patterns that support our analysis."
-            if language == "hi":
-                chart_explanation = "यह चार्ट हमारे विषय से संबंधित प्रमुख डेटा बिंदुओं को दर्शाता है। डेटा ऐसे रुझान और पैटर्न दिखाता है जो हमारे विश्लेषण का समर्थन करते हैं।"
-            elif language == "te":
-                chart_explanation = "ఈ చార్ట్ మన అంశానికి సంబంధించిన కీలక డేటా పాయింట్లను చూపిస్తుంది. డేటా మన విశ్లేషణకు మద్దతు ఇచ్చే ధోరణులు మరియు నమూనాలను చూపిస్తుంది."
-            
-            tf.text = chart_explanation
-            
+        if image_stream:
+            textbox = slide.shapes.add_textbox(
+                Inches(0.5), Inches(1.5), Inches(5.75), Inches(5.0))
+        else:
+            textbox = slide.shapes.add_textbox(
+                Inches(0.7), Inches(1.5), Inches(11.0), Inches(5.0))
+        
+        tf = textbox.text_frame
+        tf.word_wrap = True
+        tf.text = content_text
+        
+        if content_text.startswith('-'):
+            tf.text = ""
+            lines = content_text.split('\n')
+            for line_idx, line in enumerate(lines):
+                p = tf.add_paragraph()
+                p.text = line.lstrip('- ')
+                p.level = 0
+                p.font.size = CONTENT_FONT_SIZE
+                p.font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
+                p.font.color.rgb = selected_theme["text_color"]
+                
+                bullet_style = variant_info.get("bullet_style", "square")
+                apply_bullet_styling(p, bullet_style, selected_theme["accent_color"])
+        else:
             for paragraph in tf.paragraphs:
                 paragraph.font.size = CONTENT_FONT_SIZE
                 paragraph.font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
                 paragraph.font.color.rgb = selected_theme["text_color"]
                 paragraph.space_after = Pt(12)
+        
+        if selected_theme["shadow"]:
+            add_text_shadow(tf)
+        
+        if image_stream:
+            try:
+                slide.shapes.add_picture(image_stream, Inches(7.0), Inches(1.5), width=Inches(IMAGE_WIDTH_INCHES))
+            except OSError as e:
+                # The cached file can be evicted by another worker before it is embedded
+                app.logger.warning(f"Could not embed image: {str(e)}")
+                textbox.width = Inches(11.0)
+    
+    # Add chart slide if CSV file is provided
+    if deck["chart"]:
+        chart_slide = prs.slides.add_slide(prs.slide_layouts[6])
+        decorate_slide(chart_slide, theme, variant)
+        
+        title_shape = chart_slide.shapes.add_textbox(
+            Inches(0.5), Inches(0.5), Inches(11.0), Inches(0.8))
+        title_tf = title_shape.text_frame
+        chart_title, chart_explanation = chart_slide_text(language)
+        title_tf.text = chart_title
+        title_tf.paragraphs[0].font.size = TITLE_FONT_SIZE
+        title_tf.paragraphs[0].font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
+        title_tf.paragraphs[0].font.color.rgb = selected_theme["title_color"]
+        title_tf.paragraphs[0].font.bold = True
+        
+        # Left side text explanation
+        textbox = chart_slide.shapes.add_textbox(
+            Inches(0.7), Inches(1.5), Inches(4.0), Inches(5.0))
+        tf = textbox.text_frame
+        tf.word_wrap = True
+        
+        tf.text = chart_explanation
+        
+        for paragraph in tf.paragraphs:
+            paragraph.font.size = CONTENT_FONT_SIZE
+            paragraph.font.name = "Mangal" if language == "hi" else "Gautami" if language == "te" else variant_info["font_name"]
+            paragraph.font.color.rgb = selected_theme["text_color"]
+            paragraph.space_after = Pt(12)
+        
+        if selected_theme["shadow"]:
+            add_text_shadow(tf)
+        
+        # Generate chart on the right side
+        if deck["chart"]["data"]:
+            generate_chart(chart_slide, deck["chart"]["data"], deck["chart"]["chart_type"], language)
+
+    for slide in prs.slides:
+        footer = slide.shapes.add_textbox(Inches(0.5), Inches(7.0), Inches(12.0), Inches(0.3))
+        tf = footer.text_frame
+        tf.text = f"{deck['topic']} | {deck['date']}"
+        tf.paragraphs[0].font.size = Pt(9)
+        tf.paragraphs[0].font.color.rgb = selected_theme["text_color"]
+        tf.paragraphs[0].font.italic = True
+        tf.paragraphs[0].alignment = PP_ALIGN.RIGHT
+
+    return prs
+
+PDF_CHART_COLORS = [(0, 102, 204), (255, 153, 0), (0, 153, 102), (204, 51, 102), (102, 102, 153), (153, 153, 0)]
+PDF_PUNCTUATION = str.maketrans({"\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"', "\u2013": "-", "\u2014": "-", "\u2022": "-", "\u2026": "..."})
+
+def pdf_text(text):
+    # FPDF core fonts are Latin-1 only
+    return str(text).translate(PDF_PUNCTUATION).encode('latin-1', 'replace').decode('latin-1')
+
+def image_bytes(image):
+    if isinstance(image, (str, Path)):
+        with open(image, 'rb') as image_file:
+            return image_file.read()
+    return image.getvalue()
+
+def draw_pdf_chart(pdf, chart, x, y, w, h, language="en"):
+    chart_type = chart["chart_type"]
+    categories = chart["data"]["categories"]
+    series = [
+        (name, [value if isinstance(value, (int, float)) and value == value else None for value in values])
+        for name, values in chart["data"]["series"]
+    ]
+    numbers = [value for _, values in series for value in values if value is not None]
+    if not categories or not numbers:
+        return
+    
+    pdf.set_font("Arial", 'B', 12)
+    pdf.set_xy(x, y)
+    pdf.cell(w, 8, txt=pdf_text(chart_title_text(language)), align='C')
+    y += 10
+    h -= 18
+    
+    if chart_type == "pie":
+        # FPDF has no sector primitive, so pie data is drawn as a 100% stacked bar with a legend
+        values = [max(value or 0, 0) for value in series[0][1]]
+        total = sum(values) or 1
+        pdf.set_font("Arial", '', 8)
+        offset = x
+        for index, value in enumerate(values):
+            segment = w * value / total
+            pdf.set_fill_color(*PDF_CHART_COLORS[index % len(PDF_CHART_COLORS)])
+            pdf.rect(offset, y, segment, 12, 'F')
+            offset += segment
+        for index, (category, value) in enumerate(zip(categories[:12], values[:12])):
+            pdf.set_fill_color(*PDF_CHART_COLORS[index % len(PDF_CHART_COLORS)])
+            pdf.rect(x, y + 16 + index * 5, 3, 3, 'F')
+            pdf.set_xy(x + 5, y + 15 + index * 5)
+            pdf.cell(w - 5, 5, txt=pdf_text(f"{category}: {100 * value / total:.1f}%"))
+        return
+    
+    low, high = min(min(numbers), 0), max(max(numbers), 0)
+    span = (high - low) or 1
+    baseline = y + h * high / span
+    step = w / len(categories)
+    if chart_type == "scatter":
+        # Scatter categories are the x values; like the PPTX XY chart they sit on a linear axis
+        x_low, x_high = min(categories), max(categories)
+        x_span = x_high - x_low
+    
+    pdf.set_draw_color(120, 120, 120)
+    pdf.line(x, baseline, x + w, baseline)
+    for series_index, (_, values) in enumerate(series):
+        color = PDF_CHART_COLORS[series_index % len(PDF_CHART_COLORS)]
+        pdf.set_fill_color(*color)
+        pdf.set_draw_color(*color)
+        previous = None
+        for index, value in enumerate(values):
+            if value is None:
+                previous = None
+                continue
+            point_y = y + h * (high - value) / span
+            if chart_type == "bar":
+                bar_width = step * 0.7 / len(series)
+                bar_x = x + index * step + step * 0.15 + series_index * bar_width
+                pdf.rect(bar_x, min(point_y, baseline), bar_width, abs(baseline - point_y), 'F')
+            else:
+                if chart_type == "scatter":
+                    point_x = x + w * ((categories[index] - x_low) / x_span if x_span else 0.5)
+                else:
+                    point_x = x + (index + 0.5) * step
+                if chart_type == "line" and previous:
+                    pdf.line(previous[0], previous[1], point_x, point_y)
+                pdf.rect(point_x - 0.8, point_y - 0.8, 1.6, 1.6, 'F')
+                previous = (point_x, point_y)
+    
+    if chart_type == "scatter":
+        pdf.set_font("Arial", '', 7)
+        pdf.set_xy(x, y + h + 1)
+        pdf.cell(w / 2, 4, txt=pdf_text(f"{x_low:g}"), align='L')
+        pdf.cell(w / 2, 4, txt=pdf_text(f"{x_high:g}"), align='R')
+    elif len(categories) <= 12:
+        pdf.set_font("Arial", '', 7)
+        for index, category in enumerate(categories):
+            pdf.set_xy(x + index * step, y + h + 1)
+            pdf.cell(step, 4, txt=pdf_text(str(category)[:12]), align='C')
+
+def render_pdf(deck):
+    # One-pass PDF export straight from the deck model, no PPTX save/reload round-trip; returns the PDF bytes
+    if deck["language"] in ("hi", "te"):
+        raise ValueError("PDF export only supports Latin-script presentations")
+    
+    from fpdf import FPDF
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.set_auto_page_break(auto=True, margin=15)
+    
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 24)
+    pdf.cell(0, 20, txt=pdf_text(deck["topic"] or "AI-Generated Presentation"), ln=True, align='C')
+    pdf.set_font("Arial", 'I', 14)
+    pdf.cell(0, 10, txt=f"Created on {deck['date']}", ln=True, align='C')
+    
+    pages = [{"title": deck["slides"][0]["title"], "content": "Powered by AI", "image": None}] + deck["slides"]
+    
+    with tempfile.TemporaryDirectory(dir=ARTIFACT_DIR) as image_dir:
+        for i, page in enumerate(pages):
+            pdf.add_page()
+            
+            pdf.set_font("Arial", 'I', 10)
+            pdf.cell(0, 10, txt=f"Slide {i+1}", ln=True, align='R')
+            pdf.set_font("Arial", 'B', 16)
+            pdf.cell(0, 15, txt=pdf_text(page["title"]), ln=True)
             
-            if selected_theme["shadow"]:
-                add_text_shadow(tf)
+            body_width = 0
+            if page["image"]:
+                try:
+                    data = image_bytes(page["image"])
+                    extension = "png" if data.startswith(b'\x89PNG') else "jpg"
+                    image_path = os.path.join(image_dir, f"slide{i}.{extension}")
+                    with open(image_path, 'wb') as image_file:
+                        image_file.write(data)
+                    pdf.image(image_path, x=165, y=40, w=115)
+                    body_width = 145
+                except Exception as e:
+                    app.logger.warning(f"Could not add image to PDF: {str(e)}")
             
-            # Generate chart on the right side
-            generate_chart(chart_slide, csv_file, chart_type, language)
-
-        for slide in prs.slides:
-            footer = slide.shapes.add_textbox(Inches(0.5), Inches(7.0), Inches(12.0), Inches(0.3))
-            tf = footer.text_frame
-            tf.text = f"{topic} | {pd.Timestamp.now().strftime('%Y-%m-%d')}"
-            tf.paragraphs[0].font.size = Pt(9)
-            tf.paragraphs[0].font.color.rgb = selected_theme["text_color"]
-            tf.paragraphs[0].font.italic = True
-            tf.paragraphs[0].alignment = PP_ALIGN.RIGHT
-
-        output_dir = tempfile.mkdtemp()
+            pdf.set_font("Arial", '', 12)
+            for paragraph in content_paragraphs(page["content"]):
+                pdf.multi_cell(body_width, 8, txt=pdf_text(paragraph.strip()))
+                pdf.ln(4)
+        
+        if deck["chart"]:
+            chart_title, chart_explanation = chart_slide_text(deck["language"])
+            pdf.add_page()
+            pdf.set_font("Arial", 'I', 10)
+            pdf.cell(0, 10, txt=f"Slide {len(pages) + 1}", ln=True, align='R')
+            pdf.set_font("Arial", 'B', 16)
+            pdf.cell(0, 15, txt=pdf_text(chart_title), ln=True)
+            pdf.set_font("Arial", '', 12)
+            pdf.multi_cell(110, 8, txt=pdf_text(chart_explanation))
+            if deck["chart"]["data"]:
+                draw_pdf_chart(pdf, deck["chart"], 140, 40, 140, 110, deck["language"])
+    
+    return pdf.output(dest='S').encode('latin-1')
+
+def create_presentation(topic, text_file=None, csv_file=None, theme="corporate", variant="professional", language="en", include_images=True, summarize=False, chart_type="bar", export_format="pptx", slide_count=5, max_workers=None, batch_outline=None, progress=None, provider=None):
+    # Returns the PPTX path; for exportFormat=pdf a PDF rendered from the same deck model is written next to it
+    try:
+        deck = generate_deck(topic, text_file, csv_file, language, include_images, chart_type,
+                             slide_count, max_workers, batch_outline, progress, summarize, provider)
+        with span("styling"):
+            prs = render_pptx(deck, theme, variant)
+
+        output_dir = tempfile.mkdtemp(prefix="deck-", dir=ARTIFACT_DIR)
         pptx_filepath = os.path.join(output_dir, f"{topic or 'presentation'}_presentation.pptx")
-        prs.save(pptx_filepath)
+        with span("pptx_save"):
+            prs.save(pptx_filepath)
+        
+        if export_format == 'pdf':
+            try:
+                with span("pdf_export"):
+                    pdf_data = render_pdf(deck)
+                with open(pptx_filepath.replace('.pptx', '.pdf'), 'wb') as pdf_file:
+                    pdf_file.write(pdf_data)
+            except Exception as e:
+                app.logger.exception("PDF export failed, only the PPTX is available")
+                fallbacks.inc(kind="pdf")
         
         return pptx_filepath
     except Exception as e:
         app.logger.exception("Error in create_presentation")
         raise e
 
+def create_presentation_stream(topic, text_file=None, csv_file=None, theme="corporate", variant="professional", language="en", include_images=True, summarize=False, chart_type="bar", export_format="pptx", slide_count=5, max_workers=None, batch_outline=None, progress=None, provider=None):
+    # In-memory variant of create_presentation: returns (stream, extension) without touching the disk
+    # unless the file outgrows SPOOL_MAX_BYTES. The caller owns the stream and must close it.
+    deck = generate_deck(topic, text_file, csv_file, language, include_images, chart_type,
+                         slide_count, max_workers, batch_outline, progress, summarize, provider)
+    return render_presentation_stream(deck, theme, variant, export_format)
+
+def render_presentation_stream(deck, theme="corporate", variant="professional", export_format="pptx"):
+    stream = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=ARTIFACT_DIR)
+    extension = "pptx"
+    if export_format == 'pdf':
+        try:
+            with span("pdf_export"):
+                stream.write(render_pdf(deck))
+            extension = "pdf"
+        except Exception as e:
+            app.logger.exception("PDF export failed, falling back to PPTX")
+            fallbacks.inc(kind="pdf")
+            stream.seek(0)
+            stream.truncate()
+    # The PPTX is only built when it is what gets sent
+    if extension == "pptx":
+        with span("styling"):
+            prs = render_pptx(deck, theme, variant)
+        with span("pptx_save"):
+            prs.save(stream)
+    stream.seek(0)
+    return stream, extension
+
+def send_presentation_stream(stream, extension, download_name, etag=None):
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    response = send_file(stream, mimetype=MIMETYPES[extension], as_attachment=True,
+                         download_name=f"{download_name}.{extension}")
+    response.content_length = size
+    response.call_on_close(stream.close)
+    if etag:
+        set_result_cache_headers(response, etag)
+        # Werkzeug only evaluates Range/If-Range for GET and HEAD; a generation is a POST whose
+        # result is fully determined by the ETag, so it is evaluated as if it were a GET
+        try:
+            response.make_conditional(dict(request.environ, REQUEST_METHOD="GET"), accept_ranges=True,
+                                      complete_length=size)
+        except RequestedRangeNotSatisfiable as e:
+            stream.close()
+            return set_result_cache_headers(e.get_response(), etag)
+        # make_conditional only advertises ranges when the request already sent a Range header
+        response.accept_ranges = "bytes"
+    return response
+
+def set_result_cache_headers(response, etag):
+    response.set_etag(etag)
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = RESULT_CACHE_MAX_AGE
+    return response
+
+def upload_digest(upload):
+    # Hashes an upload in blocks and rewinds it for the generation that follows
+    if not upload:
+        return None
+    digest = hashlib.sha256()
+    upload.seek(0)
+    for block in iter(lambda: upload.read(TEXT_READ_BYTES), b""):
+        digest.update(block)
+    upload.seek(0)
+    return digest.hexdigest()
+
+def generation_key(params):
+    # Digest of everything that changes the generated file; whitespace-only topic differences are ignored.
+    # The title slide carries the render date, so the key (and the ETag) changes with the date too.
+    topic = " ".join((params.get("topic") or "").split())
+    inputs = [time.strftime('%Y-%m-%d'), topic, upload_digest(params.get("text_file")),
+              upload_digest(params.get("csv_file"))]
+    inputs += [params.get(name) for name in ("theme", "variant", "language", "include_images", "summarize",
+                                             "chart_type", "export_format", "slide_count", "batch_outline",
+                                             "provider")]
+    return hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()
+
+def open_cached_result(key, export_format):
+    if result_cache is None:
+        return None
+    extension = "pdf" if export_format == "pdf" else "pptx"
+    path = result_cache.get(f"{key}.{extension}")
+    if not path:
+        return None
+    try:
+        return open(path, "rb"), extension
+    except OSError:
+        # Evicted between the lookup and the open
+        return None
+
+def flight_result_path(base, extension, complete):
+    return f"{base}.{extension}" if complete else f"{base}.fallback.{extension}"
+
+def read_flight_result(base, since):
+    # (file, extension, complete) published by the leader we waited on, if it finished after we
+    # started waiting
+    for extension in MIMETYPES:
+        for complete in (True, False):
+            path = flight_result_path(base, extension, complete)
+            try:
+                if os.stat(path).st_mtime >= since:
+                    return open(path, "rb"), extension, complete
+            except OSError:
+                continue
+    return None
+
+def publish_flight_result(base, key, stream, extension, complete=True):
+    # With the result cache enabled the cache entry is the hand-over, otherwise a file next to the lock.
+    # Decks that needed a fallback are only handed to the requests already waiting, never cached, so
+    # the next request asks the upstreams again.
+    if complete and result_cache is not None:
+        result_cache.put_stream(f"{key}.{extension}", stream)
+        stream.seek(0)
+        return
+    tmp_path = f"{base}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as tmp_file:
+            shutil.copyfileobj(stream, tmp_file, TEXT_READ_BYTES)
+        os.replace(tmp_path, flight_result_path(base, extension, complete))
+    except OSError as e:
+        app.logger.warning(f"Could not publish result for waiting requests: {str(e)}")
+    stream.seek(0)
+
+def complete_presentation_stream(params):
+    # create_presentation_stream plus whether the deck was generated without any fallback
+    with track_fallbacks() as taken:
+        stream, extension = create_presentation_stream(**params)
+    return stream, extension, not taken
+
+def try_flight_lock(lock_file):
+    import fcntl
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+def flight_lock_is_current(lock_file, path):
+    # sweep_artifacts unlinks idle lock files while holding their lock. A lock taken on a file that
+    # was unlinked meanwhile excludes nobody, so the caller has to open the path again and retry.
+    try:
+        return os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino
+    except OSError:
+        return False
+
+def remove_idle_flight_lock(path):
+    # Only a lock file nobody holds is removed, and it is removed while holding its lock
+    with open(path, "a") as lock_file:
+        if not try_flight_lock(lock_file):
+            return False
+        os.remove(path)
+        return True
+
+def coalesced_presentation_stream(params, endpoint="generate", key=None):
+    # Result-cache lookup plus a single-flight wrapper around create_presentation_stream, shared by
+    # all worker processes through an flock per generation key. The first request generates and
+    # publishes its file; identical requests that arrive meanwhile wait for the lock and stream the
+    # published file instead. If the leader fails, the next waiter takes over and generates itself.
+    # Returns (stream, extension, complete); complete is False when the deck needed a fallback.
+    key = key or generation_key(params)
+    cached = open_cached_result(key, params.get("export_format"))
+    if cached:
+        return (*cached, True)
+    if not SINGLE_FLIGHT:
+        stream, extension, complete = complete_presentation_stream(params)
+        if complete and result_cache is not None:
+            publish_flight_result(None, key, stream, extension)
+        return stream, extension, complete
+    import fcntl
+    base = os.path.join(ARTIFACT_DIR, f"flight-{key}")
+    lock_path = f"{base}.lock"
+    started = time.time()
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT
+    while True:
+        with open(lock_path, "a") as lock_file:
+            waited = not try_flight_lock(lock_file)
+            if waited:
+                with span("coalesced_wait"):
+                    while not try_flight_lock(lock_file):
+                        if time.monotonic() >= deadline:
+                            app.logger.warning("Gave up waiting for an identical generation, generating anyway")
+                            return complete_presentation_stream(params)
+                        time.sleep(SINGLE_FLIGHT_POLL)
+            if not flight_lock_is_current(lock_file, lock_path):
+                continue
+            if waited:
+                result = open_cached_result(key, params.get("export_format"))
+                result = (*result, True) if result else read_flight_result(base, started)
+                if result:
+                    coalesced.inc(endpoint=endpoint)
+                    return result
+            try:
+                stream, extension, complete = complete_presentation_stream(params)
+                publish_flight_result(base, key, stream, extension, complete)
+                return stream, extension, complete
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+@contextmanager
+def traced_request(endpoint):
+    # Collects the spans of one generation and emits them as a single structured log line
+    trace = {"request_id": uuid.uuid4().hex[:12], "endpoint": endpoint, "status": "error", "spans": []}
+    token = current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        duration = time.perf_counter() - start
+        request_seconds.observe(duration, endpoint=endpoint, status=trace["status"])
+        trace["total_ms"] = round(duration * 1000, 1)
+        app.logger.info("generation trace %s", json.dumps(trace, ensure_ascii=False))
+
 def ensure_slide_has_title(slide):
     has_title = False
     for shape in slide.shapes:
@@ -718,19 +2845,24 @@ def ensure_slide_has_title(slide):
     
     return slide.shapes.title
 
-@app.route('/generate', methods=['POST'])
-def generate():
-    topic = request.form.get('topic')
-    text_file = request.files.get('textFile')
-    csv_file = request.files.get('csvFile')
-    theme = request.form.get('theme', 'corporate')
-    variant = request.form.get('variant', 'professional')
-    language = request.form.get('language', 'en')
-    include_images = request.form.get('includeImages', 'true') == 'true'
-    summarize = request.form.get('summarize', 'false') == 'true'
-    chart_type = request.form.get('chartType', 'bar')
-    export_format = request.form.get('exportFormat', 'pptx')
-    slide_count = request.form.get('slideCount', '5')
+def buffer_upload(upload):
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=ARTIFACT_DIR)
+    shutil.copyfileobj(upload.stream, buffer, TEXT_READ_BYTES)
+    buffer.seek(0)
+    return buffer
+
+def parse_generation_form(form, files, buffer_files=False):
+    # Shared request parsing for every generation endpoint.
+    # buffer_files copies the uploads so they outlive the request (background jobs); large
+    # uploads spill to disk instead of being held in memory.
+    text_file = files.get('textFile')
+    csv_file = files.get('csvFile')
+    if buffer_files:
+        text_file = buffer_upload(text_file) if text_file else None
+        csv_file = buffer_upload(csv_file) if csv_file else None
+    
+    chart_type = form.get('chartType', 'bar')
+    slide_count = form.get('slideCount', '5')
     
     # Validate chart_type
     if chart_type not in CHART_TYPES:
@@ -744,76 +2876,738 @@ def generate():
             slide_count = 10
     except ValueError:
         slide_count = 5
+    
+    return {
+        "topic": form.get('topic'),
+        "text_file": text_file,
+        "csv_file": csv_file,
+        "theme": form.get('theme', 'corporate'),
+        "variant": form.get('variant', 'professional'),
+        "language": form.get('language', 'en'),
+        "include_images": form.get('includeImages', 'true') == 'true',
+        "summarize": form.get('summarize', 'false') == 'true',
+        "chart_type": chart_type,
+        "export_format": form.get('exportFormat', 'pptx'),
+        "slide_count": slide_count,
+        "batch_outline": form.get('batchOutline', 'true' if BATCH_OUTLINE else 'false') == 'true',
+        "provider": form.get('provider') if form.get('provider') in TEXT_PROVIDERS else None,
+    }
+
+@app.route('/generate', methods=['POST'])
+def generate():
+    params = parse_generation_form(request.form, request.files)
+    topic = params["topic"]
+
+    if not topic and not params["text_file"]:
+        return jsonify({"error": "Topic or text file required"}), 400
+
+    # The ETag names the inputs, so a client holding it already has a deck for this request
+    key = generation_key(params)
+    if key in request.if_none_match:
+        return set_result_cache_headers(Response(status=304), key)
+
+    with traced_request("generate") as trace:
+        try:
+            stream, extension, complete = coalesced_presentation_stream(params, key=key)
+            trace["status"] = "ok"
+            # A deck built with fallbacks gets no ETag, so clients do not hold on to it
+            response = send_presentation_stream(stream, extension, f"{topic or 'presentation'}_presentation",
+                                                etag=key if complete else None)
+            response.headers["X-Request-ID"] = trace["request_id"]
+            return response
+        except Exception as e:
+            app.logger.exception("Error generating presentation")
+            return jsonify({"error": str(e)}), 500
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_QUEUE_LIMIT = int(os.environ.get('JOB_QUEUE_LIMIT', '20'))
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH', os.path.join(tempfile.gettempdir(), 'presentation_jobs.sqlite3'))
+SSE_KEEPALIVE_SECONDS = 15
+
+class JobStore:
+    # SQLite-backed job table, so any worker process can answer status and result requests
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, status TEXT, progress TEXT, result_path TEXT,
+                download_name TEXT, error TEXT, created REAL, updated REAL)""")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def create(self, progress):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO jobs (id, status, progress, created, updated) VALUES (?, 'queued', ?, ?, ?)",
+                         (job_id, json.dumps(progress), now, now))
+        return job_id
+
+    def update(self, job_id, **fields):
+        if "progress" in fields:
+            fields["progress"] = json.dumps(fields["progress"])
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def delete_before(self, timestamp):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE updated < ? AND status IN ('done', 'failed')", (timestamp,))
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["progress"] = json.loads(job["progress"] or "{}")
+        return job
+
+job_store = JobStore(JOB_DB_PATH)
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+pending_jobs = set()
+pending_jobs_lock = threading.Lock()
+
+def initial_job_progress(slide_count):
+    return {
+        "titles_done": False,
+        "slides_total": slide_count,
+        "slides_done": 0,
+        "images_done": 0,
+        "chart_done": False,
+    }
 
-    if not topic and not text_file:
+def run_job(job_id, params, listener=None):
+    progress_state = initial_job_progress(params["slide_count"])
+    progress_lock = threading.Lock()
+
+    def on_progress(event, data):
+        if listener:
+            listener(event, data)
+        with progress_lock:
+            if event == "titles":
+                progress_state["titles_done"] = True
+                progress_state["slides_total"] = len(data["titles"])
+            elif event == "slide_text":
+                progress_state["slides_done"] += 1
+            elif event == "slide_image":
+                progress_state["images_done"] += 1
+            elif event == "chart":
+                progress_state["chart_done"] = True
+            job_store.update(job_id, progress=progress_state)
+
+    with traced_request("job") as trace:
+        try:
+            job_store.update(job_id, status="running")
+            topic = params["topic"]
+            output_filepath = create_presentation(**params, progress=on_progress)
+            download_name = f"{topic or 'presentation'}_presentation.pptx"
+            
+            pdf_filepath = output_filepath.replace('.pptx', '.pdf')
+            if params["export_format"] == 'pdf' and os.path.exists(pdf_filepath):
+                output_filepath = pdf_filepath
+                download_name = f"{topic or 'presentation'}_presentation.pdf"
+            
+            job_store.update(job_id, status="done", result_path=output_filepath, download_name=download_name)
+            trace["status"] = "ok"
+        except Exception as e:
+            app.logger.exception(f"Job {job_id} failed")
+            job_store.update(job_id, status="failed", error=str(e))
+        finally:
+            with pending_jobs_lock:
+                pending_jobs.discard(job_id)
+            if listener:
+                listener("finished", None)
+
+def submit_job(params, listener=None):
+    # Returns the new job id, or None when the queue is full
+    with pending_jobs_lock:
+        if len(pending_jobs) >= JOB_QUEUE_LIMIT:
+            return None
+        job_id = job_store.create(initial_job_progress(params["slide_count"]))
+        pending_jobs.add(job_id)
+    
+    job_executor.submit(run_job, job_id, params, listener)
+    return job_id
+
+def iter_presentation_events(params):
+    # Generator-based view of a generation: yields (event, data) as the titles, each slide's text,
+    # each image and the chart become ready, then a final "done" or "error" event.
+    events = queue.Queue()
+    job_id = submit_job(params, lambda event, data: events.put((event, data)))
+    if job_id is None:
+        yield "error", {"error": "Too many presentations in progress, try again later"}
+        return
+    
+    yield "queued", {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+    while True:
+        try:
+            event, data = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+        except queue.Empty:
+            yield "keepalive", None
+            continue
+        if event == "finished":
+            break
+        yield event, data
+    
+    job = job_store.get(job_id)
+    if job["status"] == "done":
+        yield "done", {"job_id": job_id, "result_url": f"/jobs/{job_id}/result", "download_name": job["download_name"]}
+    else:
+        yield "error", {"job_id": job_id, "error": job["error"]}
+
+def format_sse(event, data):
+    if event == "keepalive":
+        return ": keep-alive\n\n"
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/generate/stream', methods=['POST'])
+def generate_stream():
+    params = parse_generation_form(request.form, request.files, buffer_files=True)
+    if not params["topic"] and not params["text_file"]:
         return jsonify({"error": "Topic or text file required"}), 400
+    
+    events = (format_sse(event, data) for event, data in iter_presentation_events(params))
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    params = parse_generation_form(request.form, request.files, buffer_files=True)
+    if not params["topic"] and not params["text_file"]:
+        return jsonify({"error": "Topic or text file required"}), 400
+    
+    job_id = submit_job(params)
+    if job_id is None:
+        return jsonify({"error": "Too many presentations in progress, try again later"}), 503
+    return jsonify({
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result",
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({
+        "job_id": job_id,
+        "status": job["status"],
+        "progress": job["progress"],
+        "error": job["error"],
+    })
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == "failed":
+        return jsonify({"error": job["error"]}), 500
+    if job["status"] != "done":
+        return jsonify({"error": "Job is not finished", "status": job["status"]}), 409
+    if not os.path.exists(job["result_path"]):
+        return jsonify({"error": "Result is no longer available"}), 410
+    return send_file(job["result_path"], as_attachment=True, download_name=job["download_name"])
+
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', '2'))
+BATCH_MAX_DECKS = int(os.environ.get('BATCH_MAX_DECKS', '100'))
+BATCH_COPY_BYTES = 1024 * 1024
+
+class ZipChunkWriter:
+    # Write-only sink for zipfile; without seek() zipfile streams entries with data descriptors,
+    # and whatever was written since the last drain() goes out as one response chunk
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
 
+def batch_spec_form(spec, defaults=None):
+    # Batch specs use the /generate form field names; JSON booleans and numbers are accepted too
+    form = {}
+    for key, value in {**(defaults or {}), **spec}.items():
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        elif value is not None:
+            value = str(value)
+        form[key] = value
+    return form
+
+def batch_entry_name(index, topic, extension):
+    slug = re.sub(r'[^\w-]+', '-', topic or '').strip('-')[:60] or 'presentation'
+    return f"{index + 1:03d}-{slug}.{extension}"
+
+def run_batch_deck(index, spec, defaults, resolve_files):
+    # Generates one deck of a batch; any failure is returned in the manifest entry instead of raised
+    entry = {"index": index, "topic": spec.get("topic") if isinstance(spec, dict) else None,
+             "status": "error", "file": None, "error": None}
+    files = {}
+    start = time.perf_counter()
+    with traced_request("batch") as trace:
+        try:
+            if isinstance(spec, Exception):
+                raise spec
+            if not isinstance(spec, dict):
+                raise ValueError("Deck spec must be an object")
+            files = resolve_files(spec) if resolve_files else {}
+            params = parse_generation_form(batch_spec_form(spec, defaults), files)
+            if not params["topic"] and not params["text_file"]:
+                raise ValueError("Topic or text file required")
+            stream, extension, _ = coalesced_presentation_stream(params, "batch")
+            entry.update(status="ok", file=batch_entry_name(index, params["topic"], extension))
+            trace["status"] = "ok"
+            return entry, stream
+        except Exception as e:
+            app.logger.exception(f"Batch deck {index} failed")
+            entry["error"] = str(e)
+            return entry, None
+        finally:
+            for upload in files.values():
+                upload.close()
+            entry["seconds"] = round(time.perf_counter() - start, 3)
+
+def iter_batch_zip(specs, defaults=None, workers=None, resolve_files=None, on_result=None):
+    # Generates the decks of a batch on a worker pool and yields a ZIP archive in chunks: each deck is
+    # written as soon as it finishes, followed by manifest.json with one entry per spec in input order.
+    # Specs can be any iterable (e.g. lines of a JSONL file); at most 2 * workers are held at once.
+    workers = max(1, workers or BATCH_WORKERS)
+    writer = ZipChunkWriter()
+    manifest = []
+    with zipfile.ZipFile(writer, 'w') as archive, ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        specs = iter(enumerate(specs))
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 2 * workers:
+                try:
+                    index, spec = next(specs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if index >= BATCH_MAX_DECKS:
+                    manifest.append({"index": index, "topic": None, "status": "error", "file": None,
+                                     "error": f"Batch is limited to {BATCH_MAX_DECKS} decks", "seconds": 0})
+                    continue
+                pending.add(executor.submit(run_batch_deck, index, spec, defaults, resolve_files))
+            if not pending:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry, stream = future.result()
+                if stream is not None:
+                    # Decks are already compressed, so they are stored as-is
+                    with stream, archive.open(zipfile.ZipInfo(entry["file"], time.localtime()[:6]), 'w') as target:
+                        while True:
+                            data = stream.read(BATCH_COPY_BYTES)
+                            if not data:
+                                break
+                            target.write(data)
+                            yield writer.drain()
+                manifest.append(entry)
+                if on_result:
+                    on_result(entry)
+                yield writer.drain()
+        manifest.sort(key=lambda entry: entry["index"])
+        archive.writestr("manifest.json", json.dumps({
+            "decks": manifest,
+            "succeeded": sum(1 for entry in manifest if entry["status"] == "ok"),
+            "failed": sum(1 for entry in manifest if entry["status"] != "ok"),
+        }, ensure_ascii=False, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+    yield writer.drain()
+
+@app.route('/batch', methods=['POST'])
+def generate_batch():
+    # Accepts {"decks": [spec, ...], "defaults": {...}, "workers": n} with specs using the /generate
+    # field names, or a multipart specsFile in JSONL with the shared fields as form values
+    if 'specsFile' in request.files:
+        lines = request.files['specsFile'].read().decode('utf-8').splitlines()
+        try:
+            specs = [json.loads(line) for line in lines if line.strip()]
+        except ValueError as e:
+            return jsonify({"error": f"Invalid specsFile: {str(e)}"}), 400
+        defaults = {key: value for key, value in request.form.items() if key != 'workers'}
+        workers = request.form.get('workers')
+    else:
+        body = request.get_json(silent=True)
+        if isinstance(body, list):
+            body = {"decks": body}
+        if not isinstance(body, dict) or not isinstance(body.get("decks"), list):
+            return jsonify({"error": "Expected a JSON body with a decks list"}), 400
+        specs = body["decks"]
+        defaults = body.get("defaults") or {}
+        workers = body.get("workers")
+    
+    if not specs:
+        return jsonify({"error": "No decks requested"}), 400
     try:
-        output_filepath = create_presentation(
-            topic=topic,
-            text_file=text_file,
-            csv_file=csv_file,
-            theme=theme,
-            variant=variant,
-            language=language,
-            include_images=include_images,
-            summarize=summarize,
-            chart_type=chart_type,
-            export_format=export_format,
-            slide_count=slide_count
-        )
+        workers = min(int(workers or BATCH_WORKERS), BATCH_WORKERS)
+    except (TypeError, ValueError):
+        workers = BATCH_WORKERS
+    
+    return Response(stream_with_context(iter_batch_zip(specs, defaults, workers)), mimetype="application/zip",
+                    headers={"Content-Disposition": "attachment; filename=presentations.zip"})
+
+DECK_DIR = os.environ.get('DECK_DIR', os.path.join(tempfile.gettempdir(), 'presentation_decks'))
+DECK_TTL = int(os.environ.get('DECK_TTL', str(7 * 24 * 3600)))
+
+class DeckStore:
+    # Editable deck models on disk, shared by every worker process: <deck_id>/deck.json plus
+    # content-addressed images and per-version renders. Edits hold an exclusive flock on the deck
+    # and replace deck.json atomically.
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, deck_id, *parts):
+        if not re.fullmatch(r'[0-9a-f]{32}', deck_id or ''):
+            raise KeyError(deck_id)
+        return os.path.join(self.directory, deck_id, *parts)
+
+    @contextmanager
+    def locked(self, deck_id):
+        import fcntl
+        path = self.path_for(deck_id)
+        if not os.path.isdir(path):
+            raise KeyError(deck_id)
+        with open(os.path.join(path, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write_file(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+
+    def store_image(self, deck_id, image):
+        # Returns the stored file name; identical images are kept once per deck
+        data = image_bytes(image)
+        name = f"{hashlib.sha1(data).hexdigest()}.img"
+        path = self.path_for(deck_id, "images", name)
+        if not os.path.exists(path):
+            self.write_file(path, data)
+        return name
+
+    def create(self, deck, theme, variant):
+        deck_id = uuid.uuid4().hex
+        os.makedirs(self.path_for(deck_id))
+        model = {**deck, "deck_id": deck_id, "theme": theme, "variant": variant, "version": 1}
+        model["slides"] = [
+            {**slide, "image": self.store_image(deck_id, slide["image"]) if slide["image"] else None}
+            for slide in deck["slides"]
+        ]
+        self.save(model)
+        return model
+
+    def save(self, model):
+        model["updated"] = time.time()
+        data = json.dumps(model, ensure_ascii=False).encode('utf-8')
+        self.write_file(self.path_for(model["deck_id"], "deck.json"), data)
+
+    def load(self, deck_id):
+        try:
+            with open(self.path_for(deck_id, "deck.json"), encoding="utf-8") as model_file:
+                return json.load(model_file)
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def render(self, model, export_format="pptx", theme=None, variant=None):
+        # Renders are kept per model version, so re-downloading an unchanged deck costs nothing and
+        # an edit only pays for local rendering; all unchanged slide text and images are reused
+        if theme not in THEMES:
+            theme = model["theme"] if model["theme"] in THEMES else "corporate"
+        if variant not in THEMES[theme]["variants"]:
+            variant = model["variant"] if model["variant"] in THEMES[theme]["variants"] else "professional"
+        extension = "pdf" if export_format == "pdf" else "pptx"
+        prefix = f"v{model['version']}-"
+        path = self.path_for(model["deck_id"], "renders", f"{prefix}{theme}-{variant}.{extension}")
+        if os.path.exists(path):
+            return path
         
-        download_name = f"{topic or 'presentation'}_presentation"
+        deck = {**model, "slides": [
+            {**slide, "image": self.path_for(model["deck_id"], "images", slide["image"]) if slide["image"] else None}
+            for slide in model["slides"]
+        ]}
+        if extension == "pdf":
+            with span("pdf_export"):
+                data = render_pdf(deck)
+        else:
+            with span("styling"):
+                prs = render_pptx(deck, theme, variant)
+            buffer = BytesIO()
+            with span("pptx_save"):
+                prs.save(buffer)
+            data = buffer.getvalue()
+        self.write_file(path, data)
         
-        if export_format == 'pdf':
-            try:
-                pdf_filepath = output_filepath.replace('.pptx', '.pdf')
-                
-                pdf = FPDF()
-                pdf.set_auto_page_break(auto=True, margin=15)
-                
-                prs = Presentation(output_filepath)
-                
-                pdf.add_page()
-                pdf.set_font("Arial", 'B', 24)
-                pdf.cell(0, 20, txt=topic or "AI-Generated Presentation", ln=True, align='C')
-                pdf.set_font("Arial", 'I', 14)
-                pdf.cell(0, 10, txt=f"Created on {pd.Timestamp.now().strftime('%Y-%m-%d')}", ln=True, align='C')
-                
-                for i, slide in enumerate(prs.slides):
-                    pdf.add_page()
-                    
-                    pdf.set_font("Arial", 'I', 10)
-                    pdf.cell(0, 10, txt=f"Slide {i+1}", ln=True, align='R')
-                    
-                    if len(slide.shapes.title.text_frame.text) > 0:
-                        pdf.set_font("Arial", 'B', 16)
-                        pdf.cell(0, 15, txt=slide.shapes.title.text_frame.text, ln=True)
-                    
-                    pdf.set_font("Arial", '', 12)
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text_frame") and hasattr(shape.text_frame, "text"):
-                            if shape.text_frame.text and shape != slide.shapes.title:
-                                for paragraph in shape.text_frame.paragraphs:
-                                    text = paragraph.text.strip()
-                                    if text:
-                                        pdf.multi_cell(0, 8, txt=text)
-                                        pdf.ln(4)
-                
-                pdf.output(pdf_filepath)
-                
-                if os.path.exists(pdf_filepath):
-                    return send_file(pdf_filepath, as_attachment=True, download_name=f"{download_name}.pdf")
+        with os.scandir(os.path.dirname(path)) as it:
+            for entry in it:
+                if not entry.name.startswith(prefix):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        return path
+
+    def delete_before(self, timestamp):
+        removed = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    if os.stat(os.path.join(entry.path, "deck.json")).st_mtime >= timestamp:
+                        continue
+                except OSError:
+                    # A deck still being created has no deck.json yet; leave it for the next sweep
+                    if entry.stat(follow_symlinks=False).st_mtime >= timestamp:
+                        continue
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+deck_store = DeckStore(DECK_DIR)
+
+def deck_summary(model):
+    deck_id = model["deck_id"]
+    return {
+        "deck_id": deck_id,
+        "version": model["version"],
+        "topic": model["topic"],
+        "language": model["language"],
+        "theme": model["theme"],
+        "variant": model["variant"],
+        "chart": {"chart_type": model["chart"]["chart_type"]} if model["chart"] else None,
+        "slides": [
+            {"index": index, "title": slide["title"], "content": slide["content"], "has_image": bool(slide["image"])}
+            for index, slide in enumerate(model["slides"])
+        ],
+        "download_url": f"/decks/{deck_id}/download",
+    }
+
+@app.route('/decks', methods=['POST'])
+def create_deck():
+    # Same form as /generate, but the deck is kept so single slides can be changed later
+    params = parse_generation_form(request.form, request.files)
+    if not params["topic"] and not params["text_file"]:
+        return jsonify({"error": "Topic or text file required"}), 400
+    
+    with traced_request("decks") as trace:
+        try:
+            deck = generate_deck(params["topic"], params["text_file"], params["csv_file"], params["language"],
+                                 params["include_images"], params["chart_type"], params["slide_count"],
+                                 batch_outline=params["batch_outline"], summarize=params["summarize"],
+                                 provider=params["provider"])
+            model = deck_store.create(deck, params["theme"], params["variant"])
+            trace["status"] = "ok"
+        except Exception as e:
+            app.logger.exception("Error creating deck")
+            return jsonify({"error": str(e)}), 500
+    response = jsonify(deck_summary(model))
+    response.headers["X-Request-ID"] = trace["request_id"]
+    return response, 201
+
+@app.route('/decks/<deck_id>', methods=['GET'])
+def get_deck(deck_id):
+    model = deck_store.load(deck_id)
+    if model is None:
+        return jsonify({"error": "Deck not found"}), 404
+    return jsonify(deck_summary(model))
+
+@app.route('/decks/<deck_id>/slides/<int:index>/regenerate', methods=['POST'])
+def regenerate_slide(deck_id, index):
+    # Body (all optional): {"title": "...", "content": true, "image": true}. Only the requested parts
+    # of this one slide are sent upstream, bypassing the caches so the result actually changes.
+    options = request.get_json(silent=True) or {}
+    try:
+        with deck_store.locked(deck_id), traced_request("regenerate") as trace:
+            model = deck_store.load(deck_id)
+            # deck.json can be gone while the deck directory still exists
+            if model is None:
+                return jsonify({"error": "Deck not found"}), 404
+            if not 0 <= index < len(model["slides"]):
+                return jsonify({"error": "Slide not found"}), 404
+            slide = model["slides"][index]
+            if isinstance(options.get("title"), str) and options["title"].strip():
+                slide["title"] = options["title"].strip()
+            
+            if options.get("content", True):
+                with span("slide_content"):
+                    slide["content"] = generate_slide_content(slide["title"], model["include_images"], model["language"],
+                                                              model.get("context"), refresh=True, fallback=False,
+                                                              provider=model.get("provider"))
+            image_regenerated = False
+            if options.get("image", bool(slide["image"])) and model["include_images"]:
+                with span("slide_image"):
+                    image = generate_image(slide_image_prompt(slide["title"], slide["content"]), model["language"], refresh=True)
+                if image:
+                    slide["image"] = deck_store.store_image(deck_id, image)
+                    image_regenerated = True
                 else:
-                    return send_file(output_filepath, as_attachment=True, download_name=f"{download_name}.pptx")
-            except Exception as e:
-                app.logger.exception("PDF conversion failed, falling back to PPTX")
-                return send_file(output_filepath, as_attachment=True, download_name=f"{download_name}.pptx")
-        else:
-            return send_file(output_filepath, as_attachment=True, download_name=f"{download_name}.pptx")
+                    fallbacks.inc(kind="image")
+            
+            model["version"] += 1
+            deck_store.save(model)
+            trace["status"] = "ok"
+    except KeyError:
+        return jsonify({"error": "Deck not found"}), 404
     except Exception as e:
-        app.logger.exception("Error generating presentation")
+        app.logger.exception(f"Error regenerating slide {index} of deck {deck_id}")
+        return jsonify({"error": str(e)}), 502
+    return jsonify({**deck_summary(model), "image_regenerated": image_regenerated})
+
+@app.route('/decks/<deck_id>/slides/<int:index>', methods=['PATCH'])
+def edit_slide(deck_id, index):
+    # Body: {"title": "...", "content": "..."}; a manual edit makes no upstream calls
+    changes = request.get_json(silent=True) or {}
+    if not any(isinstance(changes.get(field), str) for field in ("title", "content")):
+        return jsonify({"error": "Expected a title and/or content string"}), 400
+    try:
+        with deck_store.locked(deck_id):
+            model = deck_store.load(deck_id)
+            # deck.json can be gone while the deck directory still exists
+            if model is None:
+                return jsonify({"error": "Deck not found"}), 404
+            if not 0 <= index < len(model["slides"]):
+                return jsonify({"error": "Slide not found"}), 404
+            for field in ("title", "content"):
+                if isinstance(changes.get(field), str):
+                    model["slides"][index][field] = changes[field]
+            model["version"] += 1
+            deck_store.save(model)
+    except KeyError:
+        return jsonify({"error": "Deck not found"}), 404
+    return jsonify(deck_summary(model))
+
+@app.route('/decks/<deck_id>/order', methods=['PUT'])
+def reorder_slides(deck_id):
+    # Body: {"order": [2, 0, 1, ...]}, a permutation of the current slide indexes
+    order = (request.get_json(silent=True) or {}).get("order")
+    try:
+        with deck_store.locked(deck_id):
+            model = deck_store.load(deck_id)
+            if model is None:
+                return jsonify({"error": "Deck not found"}), 404
+            # bool is an int subclass, and sorting mixed types would raise, so check the items first
+            if (not isinstance(order, list)
+                    or not all(isinstance(index, int) and not isinstance(index, bool) for index in order)
+                    or sorted(order) != list(range(len(model["slides"])))):
+                return jsonify({"error": "order must be a permutation of the slide indexes"}), 400
+            model["slides"] = [model["slides"][index] for index in order]
+            model["version"] += 1
+            deck_store.save(model)
+    except KeyError:
+        return jsonify({"error": "Deck not found"}), 404
+    return jsonify(deck_summary(model))
+
+@app.route('/decks/<deck_id>/download', methods=['GET'])
+def download_deck(deck_id):
+    # ?format=pptx|pdf, with optional theme/variant overrides of the stored ones
+    model = deck_store.load(deck_id)
+    if model is None:
+        return jsonify({"error": "Deck not found"}), 404
+    export_format = request.args.get('format', 'pptx')
+    try:
+        path = deck_store.render(model, export_format, request.args.get('theme'), request.args.get('variant'))
+    except Exception as e:
+        app.logger.exception(f"Error rendering deck {deck_id}")
         return jsonify({"error": str(e)}), 500
+    extension = "pdf" if export_format == "pdf" else "pptx"
+    return send_file(path, mimetype=MIMETYPES[extension], as_attachment=True,
+                     download_name=f"{model['topic'] or 'presentation'}_presentation.{extension}")
+
+def sweep_artifacts(max_age=ARTIFACT_TTL):
+    # Removes decks, PDF image scratch dirs, spilled buffers and idle single-flight locks left behind in ARTIFACT_DIR
+    cutoff = time.time() - max_age
+    removed = 0
+    with os.scandir(ARTIFACT_DIR) as it:
+        for entry in it:
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                    continue
+                if entry.name.startswith("flight-") and entry.name.endswith(".lock"):
+                    # A lock file's mtime is its creation time; generations may still hold it
+                    removed += remove_idle_flight_lock(entry.path)
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.remove(entry.path)
+                removed += 1
+            except OSError:
+                pass
+    job_store.delete_before(cutoff)
+    removed += deck_store.delete_before(time.time() - DECK_TTL)
+    return removed
+
+def artifact_janitor():
+    while True:
+        time.sleep(ARTIFACT_SWEEP_INTERVAL)
+        try:
+            removed = sweep_artifacts()
+            if removed:
+                app.logger.info(f"Artifact janitor removed {removed} expired entries")
+        except Exception as e:
+            app.logger.warning(f"Artifact sweep failed: {str(e)}")
+
+threading.Thread(target=artifact_janitor, name="artifact-janitor", daemon=True).start()
+
+@app.after_request
+def count_response_bytes(response):
+    if request.endpoint in ("generate", "job_result", "download_deck") and response.content_length:
+        response_bytes.inc(response.content_length, endpoint=request.endpoint)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    lines = []
+    for metric in (stage_seconds, request_seconds, upstream_errors, fallbacks, rate_limit_wait, response_bytes,
+                   coalesced):
+        lines.extend(metric.render())
+    
+    caches = {"llm": llm_cache, "image": image_cache, "result": result_cache, "similar_topics": similar_topics}
+    for kind in ("hits", "misses"):
+        lines.append(f"# HELP presentation_cache_{kind}_total Cache {kind} in this worker process")
+        lines.append(f"# TYPE presentation_cache_{kind}_total counter")
+        for name, cache in caches.items():
+            if cache is not None:
+                lines.append(f'presentation_cache_{kind}_total{{cache="{name}"}} {getattr(cache, kind)}')
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "llm": llm_cache.stats() if llm_cache is not None else None,
+        "image": image_cache.stats() if image_cache is not None else None,
+        "result": result_cache.stats() if result_cache is not None else None,
+        "similar_topics": similar_topics.stats() if similar_topics is not None else None,
+    })
 
 if __name__ == "__main__":
     app.run(port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,470 @@
+"""ASGI serving mode for the generation endpoint.
+
+Run from the repository root:
+
+    uvicorn backend.asgi:app --workers 2
+
+POST /generate takes the same multipart form and returns the same file, ETag and cache headers as
+the Flask app. LLM and image calls run on the event loop through one pooled httpx client, so a
+generation waiting on Gemini or Stability holds no thread. Rendering, chart data and text-file
+digests run on a CPU thread pool; SQLite and disk work runs on a separate small I/O pool, so cache
+hits never queue behind renders. Prompts, parsing, caches, rate limits, circuit breakers and metrics
+are shared with backend.app, which is still served by gunicorn backend.app:app for every other
+endpoint.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from backend import app as presentation_app
+from backend.app import (
+    PRIORITY_CONTENT, PRIORITY_IMAGE, PRIORITY_TITLES, CircuitOpenError, app as flask_app, span,
+)
+
+# Connections to the upstream APIs shared by all in-flight generations of this worker
+ASGI_HTTP_POOL_SIZE = int(os.environ.get('ASGI_HTTP_POOL_SIZE', '100'))
+# Threads for python-pptx, FPDF and pandas work
+ASGI_CPU_WORKERS = int(os.environ.get('ASGI_CPU_WORKERS', str(os.cpu_count() or 4)))
+GENAI_REST_ENDPOINT = presentation_app.GENAI_API_ENDPOINT or "https://generativelanguage.googleapis.com"
+if "://" not in GENAI_REST_ENDPOINT:
+    GENAI_REST_ENDPOINT = f"https://{GENAI_REST_ENDPOINT}"
+
+# Threads for SQLite and file work: disk caches, result hand-over files, flight locks, rate-limit bookkeeping
+ASGI_IO_WORKERS = int(os.environ.get('ASGI_IO_WORKERS', '8'))
+# Threads that may sit in RateLimiter.acquire waiting for quota, each for at most RATE_LIMIT_MAX_WAIT.
+# Calls beyond this wait for a free thread instead of taking every thread of the process.
+ASGI_LIMITER_WORKERS = int(os.environ.get('ASGI_LIMITER_WORKERS', '16'))
+
+cpu_executor = ThreadPoolExecutor(max_workers=ASGI_CPU_WORKERS, thread_name_prefix="asgi-cpu")
+io_executor = ThreadPoolExecutor(max_workers=ASGI_IO_WORKERS, thread_name_prefix="asgi-io")
+limiter_executor = ThreadPoolExecutor(max_workers=ASGI_LIMITER_WORKERS, thread_name_prefix="asgi-limiter")
+
+async def run_in(executor, func, *args):
+    # Runs func on executor in a copy of the current context, so its spans land in the request trace
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, contextvars.copy_context().run, func, *args)
+
+async def run_blocking(func, *args):
+    return await run_in(cpu_executor, func, *args)
+
+async def run_io(func, *args):
+    return await run_in(io_executor, func, *args)
+
+async def call_cache(cache, method, *args):
+    # MemoryCache is a dict behind a lock and answers inline; the SQLite and disk caches go to the I/O pool
+    if isinstance(cache, presentation_app.MemoryCache):
+        return getattr(cache, method)(*args)
+    return await run_io(getattr(cache, method), *args)
+
+def is_retryable_httpx_error(error):
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+async def call_with_retries_async(func, circuit):
+    # Same policy and metrics as presentation_app.call_with_retries, with the backoff on the event loop
+    try:
+        circuit.before_call()
+    except CircuitOpenError:
+        presentation_app.upstream_errors.inc(provider=circuit.name, kind="circuit_open")
+        raise
+    for attempt in range(presentation_app.HTTP_MAX_RETRIES + 1):
+        try:
+            result = await func()
+        except Exception as e:
+            if not is_retryable_httpx_error(e):
+                presentation_app.upstream_errors.inc(provider=circuit.name, kind="fatal")
+                circuit.record_ignored()
+                raise
+            presentation_app.upstream_errors.inc(provider=circuit.name, kind="retryable")
+            if attempt == presentation_app.HTTP_MAX_RETRIES:
+                circuit.record_failure()
+                raise
+            delay = presentation_app.backoff_delay(attempt, presentation_app.http_retry_after(e))
+            flask_app.logger.warning(f"{circuit.name} call failed ({str(e)}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            continue
+        circuit.record_success()
+        return result
+
+async def post_json_async(client, url, payload, headers, circuit, limiter=None, priority=PRIORITY_CONTENT, tokens=0):
+    async def send():
+        if limiter:
+            # The shared quota lives in SQLite and may block, so the wait happens off the loop
+            await run_in(limiter_executor, limiter.acquire, tokens, priority)
+        response = await client.post(url, headers=headers, json=payload)
+        if limiter and response.status_code == 429:
+            await run_io(limiter.drain, presentation_app.retry_after_seconds(response.headers))
+        response.raise_for_status()
+        return response.json()
+    return await call_with_retries_async(send, circuit)
+
+def gemini_generation_config(generation_config):
+    # The REST API takes camelCase keys (response_mime_type -> responseMimeType)
+    config = {}
+    for key, value in (generation_config or {}).items():
+        first, *rest = key.split("_")
+        config[first + "".join(part.title() for part in rest)] = value
+    return config
+
+async def gemini_generate(client, prompt, task=None, generation_config=None, priority=PRIORITY_CONTENT):
+    url = f"{GENAI_REST_ENDPOINT}/v1beta/models/{presentation_app.TEXT_MODEL_NAME}:generateContent"
+    payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if generation_config:
+        payload["generationConfig"] = gemini_generation_config(generation_config)
+    headers = {"Content-Type": "application/json", "x-goog-api-key": presentation_app.genai_api_key or ""}
+    tokens = presentation_app.reserved_tokens(prompt, generation_config)
+
+    data = await post_json_async(client, url, payload, headers, presentation_app.gemini_circuit,
+                                 presentation_app.gemini_limiter, priority, tokens)
+    candidates = data.get("candidates") or []
+    if not candidates:
+        raise ValueError(f"Gemini returned no candidates: {data.get('promptFeedback')}")
+    used = (data.get("usageMetadata") or {}).get("totalTokenCount")
+    if used:
+        await run_io(presentation_app.gemini_limiter.adjust, used - tokens)
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts).strip()
+
+async def openai_generate(client, prompt, task=None, generation_config=None, priority=PRIORITY_CONTENT):
+    provider = presentation_app.get_text_provider("openai")
+    generation_config = generation_config or {}
+    payload = {"model": provider.model, "messages": [{"role": "user", "content": prompt}]}
+    if generation_config.get("max_output_tokens"):
+        payload["max_tokens"] = generation_config["max_output_tokens"]
+    if generation_config.get("response_mime_type") == "application/json":
+        payload["response_format"] = {"type": "json_object"}
+    headers = {"Content-Type": "application/json"}
+    if provider.api_key:
+        headers["Authorization"] = f"Bearer {provider.api_key}"
+
+    data = await post_json_async(client, provider.url, payload, headers, presentation_app.openai_circuit,
+                                 presentation_app.openai_limiter, priority,
+                                 presentation_app.reserved_tokens(prompt, generation_config))
+    return data["choices"][0]["message"]["content"].strip()
+
+# Providers without an entry here (the local template provider) are cheap CPU work and run inline
+ASYNC_TEXT_PROVIDERS = {
+    "gemini": gemini_generate,
+    "openai": openai_generate,
+}
+
+async def provider_generate(client, provider, prompt, task, generation_config, priority):
+    generate = ASYNC_TEXT_PROVIDERS.get(provider.name)
+    if generate is None:
+        return provider.generate(prompt, task, generation_config, priority)
+    return await generate(client, prompt, task, generation_config, priority)
+
+async def generate_text_async(client, prompt, language="en", has_image=None, desired_count=None, generation_config=None, parser=None, priority=PRIORITY_CONTENT, provider=None, task=None):
+    # Async twin of presentation_app.generate_text: same cache keys, fallback provider and parser contract
+    provider = presentation_app.get_text_provider(provider)
+    llm_cache = presentation_app.llm_cache
+    key = None
+    if llm_cache is not None and provider.cache_name:
+        key = presentation_app.llm_cache_key(prompt, language, has_image, desired_count, provider.cache_name)
+        cached = await call_cache(llm_cache, "get", key)
+        if cached is not None:
+            return parser(cached) if parser else cached
+
+    try:
+        text = await provider_generate(client, provider, prompt, task, generation_config, priority)
+    except Exception as e:
+        fallback_name = presentation_app.TEXT_PROVIDER_FALLBACK
+        fallback = presentation_app.get_text_provider(fallback_name) if fallback_name in presentation_app.TEXT_PROVIDERS else None
+        if fallback is None or fallback is provider:
+            raise
+        flask_app.logger.warning(f"{provider.name} provider failed ({str(e)}), using {fallback.name}")
+        presentation_app.fallbacks.inc(kind="provider")
+        text = await provider_generate(client, fallback, prompt, task, generation_config, priority)
+        key = None
+    result = parser(text) if parser else text
+
+    if key is not None and text:
+        await call_cache(llm_cache, "set", key, text)
+    return result
+
+async def generate_slide_titles_async(client, content, language="en", desired_count=5, provider=None):
+    try:
+        titles_text = await generate_text_async(
+            client, presentation_app.slide_titles_prompt(content, language, desired_count), language,
+            desired_count=desired_count, priority=PRIORITY_TITLES, provider=provider,
+            task={"kind": "titles", "content": content, "count": desired_count})
+        return presentation_app.unique_slide_titles(titles_text, content, desired_count)
+    except Exception as e:
+        flask_app.logger.exception(f"Failed to generate titles: {str(e)}")
+        presentation_app.fallbacks.inc(kind="titles")
+        return presentation_app.fallback_slide_titles(content, desired_count)
+
+async def generate_slide_content_async(client, slide_title, has_image=True, language="en", context=None, provider=None):
+    try:
+        content = await generate_text_async(
+            client, presentation_app.slide_content_prompt(slide_title, has_image, language, context), language,
+            has_image=has_image, provider=provider,
+            task={"kind": "content", "title": slide_title, "has_image": has_image, "context": context})
+        if not has_image:
+            content = presentation_app.process_bullet_points(content)
+        return content
+    except Exception as e:
+        flask_app.logger.exception(f"Failed to generate content for '{slide_title}': {str(e)}")
+        presentation_app.fallbacks.inc(kind="content")
+        return f"Content generation failed: {str(e)}"
+
+async def generate_outline_async(client, content, language="en", desired_count=5, has_image=True, provider=None):
+    return await generate_text_async(
+        client, presentation_app.outline_prompt(content, language, desired_count, has_image), language,
+        has_image, desired_count, generation_config={"response_mime_type": "application/json"},
+        parser=lambda text: presentation_app.parse_outline(text, desired_count, has_image),
+        priority=PRIORITY_TITLES, provider=provider, task={"kind": "outline"})
+
+async def generate_image_async(client, prompt, language="en"):
+    try:
+        api_url, payload = presentation_app.image_request(prompt, language)
+        cache_key = presentation_app.image_cache_key(api_url, payload)
+        image_cache = presentation_app.image_cache
+        if image_cache is not None:
+            cached_path = await call_cache(image_cache, "get", cache_key)
+            if cached_path:
+                return cached_path
+
+        stability_api_key = os.environ.get('STABILITY_API_KEY')
+        if not stability_api_key:
+            flask_app.logger.error("STABILITY_API_KEY is not set in the environment!")
+            return None
+
+        headers = {"Authorization": f"Bearer {stability_api_key}", "Content-Type": "application/json"}
+        data = await post_json_async(client, api_url, payload, headers, presentation_app.stability_circuit,
+                                     presentation_app.stability_limiter, PRIORITY_IMAGE)
+        # Decoding, resizing and the disk cache write are CPU and file work
+        return await run_blocking(presentation_app.store_image_response, data, cache_key)
+    except Exception as e:
+        flask_app.logger.exception(f"Error generating image: {str(e)}")
+        return None
+
+async def generate_slide_assets_async(client, slide_titles, include_images=True, language="en", slide_contents=None, context=None, provider=None):
+    # Same content -> image chain per slide as presentation_app.generate_slide_assets, as tasks
+    # instead of threads; GENERATION_CONCURRENCY still bounds the slides in flight per deck
+    semaphore = asyncio.Semaphore(presentation_app.GENERATION_CONCURRENCY)
+
+    async def build_slide_assets(index, title):
+        async with semaphore:
+            content_text = None
+            if slide_contents and index < len(slide_contents):
+                content_text = slide_contents[index]
+            if content_text is None:
+                with span("slide_content"):
+                    content_text = await generate_slide_content_async(client, title, include_images, language,
+                                                                      context, provider)
+            image_stream = None
+            if include_images and (index % 2 == 0):
+                with span("slide_image"):
+                    image_stream = await generate_image_async(
+                        client, presentation_app.slide_image_prompt(title, content_text), language)
+                if not image_stream:
+                    presentation_app.fallbacks.inc(kind="image")
+            return content_text, image_stream
+
+    return await asyncio.gather(*(build_slide_assets(i, title) for i, title in enumerate(slide_titles)))
+
+async def generate_deck_async(client, topic, text_file=None, csv_file=None, language="en", include_images=True, chart_type="bar", slide_count=5, batch_outline=None, summarize=False, provider=None):
+    # Async twin of presentation_app.generate_deck. Text-file digests keep using the threaded
+    # map-reduce, since they are rare and already bounded by their own worker pool.
+    content = topic
+    context = None
+    if text_file:
+        with span("ingest"):
+            content, _ = await run_blocking(presentation_app.ingest_text_file, text_file, language, summarize,
+                                            None, provider)
+        context = content
+
+    desired_count = min(int(slide_count), 10)
+    if batch_outline is None:
+        batch_outline = presentation_app.BATCH_OUTLINE
+
+    slide_titles = None
+    slide_contents = None
+    draft = None
+    similar_topics = presentation_app.similar_topics
+    if similar_topics is not None and topic and not text_file:
+        with span("similar_lookup"):
+            draft = await run_io(similar_topics.lookup, topic, language, include_images, desired_count)
+        if draft:
+            slide_titles, slide_contents = draft["titles"], draft["contents"]
+    with presentation_app.track_fallbacks() as taken:
+        if batch_outline and not slide_titles and presentation_app.get_text_provider(provider).supports_outline:
+            try:
+                with span("outline"):
+                    slide_titles, slide_contents = await generate_outline_async(client, content, language, desired_count,
+                                                                                include_images, provider)
+            except Exception as e:
+                flask_app.logger.exception(f"Batched outline failed, falling back to per-slide generation: {str(e)}")
+                presentation_app.fallbacks.inc(kind="outline")
+        if not slide_titles:
+            with span("titles"):
+                slide_titles = await generate_slide_titles_async(client, content, language, desired_count, provider)
+        presentation_app.pad_slide_titles(slide_titles, topic, desired_count)
+
+        slide_assets = await generate_slide_assets_async(client, slide_titles, include_images, language,
+                                                         slide_contents, context, provider)
+    if (similar_topics is not None and topic and not text_file and not draft
+            and not presentation_app.SIMILAR_TOPIC_FALLBACKS.intersection(taken)):
+        await run_io(similar_topics.add, topic, language, include_images, slide_titles,
+                           [content_text for content_text, _ in slide_assets])
+
+    chart = None
+    if csv_file:
+        with span("chart_data"):
+            chart = {"chart_type": chart_type,
+                     "data": await run_blocking(presentation_app.read_chart_data, csv_file, chart_type)}
+
+    return presentation_app.deck_model(topic, language, include_images, context, provider, slide_titles,
+                                       slide_assets, chart)
+
+async def create_presentation_stream_async(client, params):
+    deck = await generate_deck_async(client, params["topic"], params["text_file"], params["csv_file"],
+                                     params["language"], params["include_images"], params["chart_type"],
+                                     params["slide_count"], params["batch_outline"], params["summarize"],
+                                     params["provider"])
+    return await run_blocking(presentation_app.render_presentation_stream, deck, params["theme"],
+                              params["variant"], params["export_format"])
+
+async def complete_presentation_stream_async(client, params):
+    with presentation_app.track_fallbacks() as taken:
+        stream, extension = await create_presentation_stream_async(client, params)
+    return stream, extension, not taken
+
+async def coalesced_presentation_stream_async(client, params, key):
+    # Result cache plus the same cross-process single-flight as presentation_app.coalesced_presentation_stream,
+    # polling the flock from the event loop instead of blocking a thread on it. Only the non-blocking
+    # flock attempts run on the loop; opening, stat-ing and reading files go through run_io.
+    cached = await run_io(presentation_app.open_cached_result, key, params["export_format"])
+    if cached:
+        return (*cached, True)
+    base = os.path.join(presentation_app.ARTIFACT_DIR, f"flight-{key}")
+    if not presentation_app.SINGLE_FLIGHT:
+        stream, extension, complete = await complete_presentation_stream_async(client, params)
+        if complete and presentation_app.result_cache is not None:
+            await run_io(presentation_app.publish_flight_result, base, key, stream, extension)
+        return stream, extension, complete
+
+    lock_path = f"{base}.lock"
+    started = time.time()
+    deadline = time.monotonic() + presentation_app.SINGLE_FLIGHT_WAIT
+    while True:
+        lock_file = await run_io(open, lock_path, "a")
+        try:
+            waited = not presentation_app.try_flight_lock(lock_file)
+            if waited:
+                with span("coalesced_wait"):
+                    while not presentation_app.try_flight_lock(lock_file):
+                        if time.monotonic() >= deadline:
+                            flask_app.logger.warning("Gave up waiting for an identical generation, generating anyway")
+                            return await complete_presentation_stream_async(client, params)
+                        await asyncio.sleep(presentation_app.SINGLE_FLIGHT_POLL)
+            if not await run_io(presentation_app.flight_lock_is_current, lock_file, lock_path):
+                continue
+            if waited:
+                result = await run_io(presentation_app.open_cached_result, key, params["export_format"])
+                if result:
+                    result = (*result, True)
+                else:
+                    result = await run_io(presentation_app.read_flight_result, base, started)
+                if result:
+                    presentation_app.coalesced.inc(endpoint="generate")
+                    return result
+            stream, extension, complete = await complete_presentation_stream_async(client, params)
+            await run_io(presentation_app.publish_flight_result, base, key, stream, extension, complete)
+            return stream, extension, complete
+        finally:
+            # Closing the lock file releases the flock
+            lock_file.close()
+
+def iter_stream(stream, size):
+    # Starlette runs sync iterators on its thread pool; the stream is closed once fully sent
+    try:
+        while True:
+            data = stream.read(presentation_app.BATCH_COPY_BYTES)
+            if not data:
+                break
+            yield data
+        presentation_app.response_bytes.inc(size, endpoint="generate")
+    finally:
+        stream.close()
+
+def result_cache_headers(etag):
+    return {"ETag": f'"{etag}"', "Cache-Control": f"private, max-age={presentation_app.RESULT_CACHE_MAX_AGE}"}
+
+def if_none_match(request, etag):
+    header = request.headers.get("if-none-match", "")
+    tags = [tag.strip().removeprefix("W/").strip('"') for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+async def generate(request):
+    form = await request.form()
+    # Empty file inputs arrive as uploads without a filename, which the Flask app treats as absent
+    files = {name: upload.file for name, upload in form.multi_items()
+             if hasattr(upload, "file") and upload.filename}
+    params = presentation_app.parse_generation_form(form, files)
+    topic = params["topic"]
+
+    if not topic and not params["text_file"]:
+        return JSONResponse({"error": "Topic or text file required"}, status_code=400)
+
+    key = await run_blocking(presentation_app.generation_key, params)
+    if if_none_match(request, key):
+        return Response(status_code=304, headers=result_cache_headers(key))
+
+    with presentation_app.traced_request("generate") as trace:
+        try:
+            stream, extension, complete = await coalesced_presentation_stream_async(request.app.state.http, params, key)
+            trace["status"] = "ok"
+        except Exception as e:
+            flask_app.logger.exception("Error generating presentation")
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    download_name = f"{topic or 'presentation'}_presentation.{extension}"
+    headers = {
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(download_name)}",
+        "Content-Length": str(size),
+        "X-Request-ID": trace["request_id"],
+        **(result_cache_headers(key) if complete else {}),
+    }
+    return StreamingResponse(iter_stream(stream, size), media_type=presentation_app.MIMETYPES[extension],
+                             headers=headers)
+
+async def metrics(request):
+    with flask_app.app_context():
+        response = presentation_app.metrics()
+    return Response(response.get_data(), media_type=response.mimetype)
+
+@asynccontextmanager
+async def lifespan(app):
+    limits = httpx.Limits(max_connections=ASGI_HTTP_POOL_SIZE, max_keepalive_connections=ASGI_HTTP_POOL_SIZE)
+    timeout = httpx.Timeout(presentation_app.HTTP_READ_TIMEOUT, connect=presentation_app.HTTP_CONNECT_TIMEOUT)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        app.state.http = client
+        yield
+    for executor in (cpu_executor, io_executor, limiter_executor):
+        executor.shutdown(wait=False)
+
+app = Starlette(routes=[
+    Route('/generate', generate, methods=['POST']),
+    Route('/metrics', metrics, methods=['GET']),
+], middleware=[
+    # Same open policy as CORS(app) on the Flask app
+    Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+], lifespan=lifespan)
@@ -0,0 +1,78 @@
+"""Generate many decks from a JSONL file of topic specs into one ZIP archive.
+
+Run from the repository root:
+
+    python -m backend.batch topics.jsonl -o decks.zip --workers 4 --theme creative
+
+Each line is a JSON object using the /generate field names, e.g.
+{"topic": "Solar power", "slideCount": 6, "exportFormat": "pdf"}. Local files can be attached
+with "textFile" and "csvFile" paths. Decks that fail are listed in manifest.json inside the
+archive and do not stop the rest of the batch, and so are specs naming an unknown theme.
+"""
+import argparse
+import json
+import sys
+
+from backend import app as presentation_app
+
+
+def read_specs(path):
+    handle = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+                if isinstance(spec, dict) and spec.get('theme') is not None and spec['theme'] not in presentation_app.THEMES:
+                    raise ValueError(f"unknown theme {spec['theme']!r}")
+                yield spec
+            except ValueError as e:
+                # Reported as a failed deck so the manifest still lines up with the input
+                yield ValueError(f"line {number}: {e}")
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def open_spec_files(spec):
+    return {field: open(spec[field], 'rb') for field in ('textFile', 'csvFile') if spec.get(field)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('specs', help="JSONL file with one deck spec per line, or - for stdin")
+    parser.add_argument('-o', '--output', default='presentations.zip', help='ZIP archive to write')
+    parser.add_argument('--workers', type=int, default=presentation_app.BATCH_WORKERS,
+                        help='decks generated concurrently')
+    parser.add_argument('--theme', choices=list(presentation_app.THEMES),
+                        help='default theme for specs that do not set one')
+    parser.add_argument('--variant', choices=sorted({variant for theme in presentation_app.THEMES.values()
+                                                     for variant in theme['variants']}),
+                        help='default variant')
+    parser.add_argument('--language', help='default language')
+    parser.add_argument('--format', dest='exportFormat', choices=('pptx', 'pdf'), help='default export format')
+    args = parser.parse_args()
+
+    defaults = {field: getattr(args, field) for field in ('theme', 'variant', 'language', 'exportFormat')
+                if getattr(args, field)}
+    failed = 0
+
+    def report(entry):
+        nonlocal failed
+        if entry["status"] == "ok":
+            print(f"[{entry['index'] + 1}] {entry['file']} ({entry['seconds']}s)", file=sys.stderr)
+        else:
+            failed += 1
+            print(f"[{entry['index'] + 1}] failed: {entry['error']}", file=sys.stderr)
+
+    with open(args.output, 'wb') as output:
+        for chunk in presentation_app.iter_batch_zip(read_specs(args.specs), defaults, args.workers,
+                                                     open_spec_files, report):
+            output.write(chunk)
+    print(f"Wrote {args.output}, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,434 @@
+"""Load test of POST /generate against stub Gemini and Stability endpoints.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.loadtest --server sync:2x8 --server async:1 --rps 2 --duration 60 \
+        --llm-latency 800 --image-latency 3000 --throttle-rate 0.02 --output load.json
+
+A stub server imitating the Gemini REST and Stability APIs is started with the configured
+latency, error rate and 429 rate. Then each --server configuration is started against it in turn:
+sync:WORKERSxTHREADS runs gunicorn backend.app:app, async:WORKERS runs uvicorn backend.asgi:app.
+Multipart /generate requests with a seeded mix of themes, slide counts, images, CSV uploads and
+PDF exports are sent open-loop at the target rate, so a slow server builds a queue instead of
+slowing the load down. Each run reports throughput, p50/p95/p99 latency, an error breakdown,
+upstream stub traffic and the peak RSS of every server process. The server's caches and request
+coalescing are disabled unless --with-caches is given.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+THEMES = ("corporate", "creative", "minimal", "bold")
+VARIANTS = ("professional", "creative", "minimal")
+CHART_TYPES = ("bar", "line", "pie", "scatter")
+WORDS = ("data model growth market system design impact users cloud process value team "
+         "strategy research quality platform network risk future insight").split()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def stub_image_payload(size):
+    from PIL import Image
+    rng = random.Random(size)
+    image = Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3))
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return json.dumps({"artifacts": [{"base64": base64.b64encode(buffer.getvalue()).decode('ascii')}]}).encode()
+
+
+def stub_text(prompt, rng):
+    # Just enough structure for the titles, outline, bullet and paragraph parsers
+    def sentence(count):
+        return " ".join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+    if "JSON" in prompt:
+        count = int(prompt.split("exactly ")[1].split()[0])
+        return json.dumps({"slides": [{"title": f"{sentence(4)} {i}", "content": sentence(40)} for i in range(count)]})
+    if "slide titles" in prompt:
+        count = int(prompt.split("exactly ")[1].split()[0])
+        return "\n".join(f"{sentence(4)} {i}" for i in range(count))
+    if "bullet points" in prompt:
+        return "\n".join(f"- {sentence(10)}" for _ in range(6))
+    return f"{sentence(30)}\n\n{sentence(30)}"
+
+
+def run_stub(port, args):
+    # Runs in its own process so the stub's threads do not compete with the load generator for the GIL
+    image_payload = stub_image_payload(args.image_size)
+    stats = Counter()
+    stats_lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def reply(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with stats_lock:
+                body = json.dumps(dict(stats)).encode()
+            self.reply(200, body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            kind = "text" if 'generateContent' in self.path else "image"
+            rng = random.Random()
+            time.sleep((args.llm_latency if kind == "text" else args.image_latency) / 1000)
+            roll = rng.random()
+            with stats_lock:
+                stats[kind] += 1
+                if roll < args.throttle_rate:
+                    stats[f"{kind}_throttled"] += 1
+                elif roll < args.throttle_rate + args.error_rate:
+                    stats[f"{kind}_errors"] += 1
+            if roll < args.throttle_rate:
+                return self.reply(429, b'{"error": "rate limited"}', {'Retry-After': '1'})
+            if roll < args.throttle_rate + args.error_rate:
+                return self.reply(503, b'{"error": "unavailable"}')
+            if kind == "image":
+                return self.reply(200, image_payload)
+            prompt = json.loads(body)["contents"][0]["parts"][0]["text"]
+            response = {"candidates": [{"content": {"parts": [{"text": stub_text(prompt, rng)}], "role": "model"},
+                                        "finishReason": "STOP"}],
+                        "usageMetadata": {"totalTokenCount": len(prompt) // 4 + 300}}
+            self.reply(200, json.dumps(response).encode())
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    ThreadingHTTPServer(('127.0.0.1', port), StubHandler).serve_forever()
+
+
+def server_command(spec, port):
+    # sync:WORKERSxTHREADS -> gunicorn, async:WORKERS -> uvicorn
+    mode, _, size = spec.partition(':')
+    if mode == 'sync':
+        workers, _, threads = (size or '1').partition('x')
+        return [sys.executable, '-m', 'gunicorn', 'backend.app:app', '--workers', workers or '1',
+                '--threads', threads or '1', '--bind', f'127.0.0.1:{port}', '--timeout', '600']
+    if mode == 'async':
+        return [sys.executable, '-m', 'uvicorn', 'backend.asgi:app', '--workers', size or '1',
+                '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+    raise ValueError(f"Unknown server spec {spec!r}, expected sync:WxT or async:W")
+
+
+def server_env(args, stub_url, scratch):
+    env = dict(os.environ)
+    env.update({
+        'GENAI_API_KEY': 'loadtest',
+        'STABILITY_API_KEY': 'loadtest',
+        'GENAI_API_ENDPOINT': stub_url,
+        'GENAI_TRANSPORT': 'rest',
+        'STABILITY_API_HOST': stub_url,
+        'TEXT_PROVIDER': 'gemini',
+        'ARTIFACT_DIR': os.path.join(scratch, 'artifacts'),
+        'JOB_DB_PATH': os.path.join(scratch, 'jobs.sqlite3'),
+        'RATE_LIMIT_DB_PATH': os.path.join(scratch, 'rate_limits.sqlite3'),
+        'DECK_DIR': os.path.join(scratch, 'decks'),
+        'LOG_LEVEL': 'WARNING',
+    })
+    if not args.with_caches:
+        env.update({'LLM_CACHE_BACKEND': 'none', 'IMAGE_CACHE_MAX_BYTES': '0', 'RESULT_CACHE_MAX_BYTES': '0',
+                    'SINGLE_FLIGHT': 'false', 'SIMILAR_TOPICS': 'false'})
+    else:
+        env.update({'LLM_CACHE_PATH': os.path.join(scratch, 'llm.sqlite3'),
+                    'IMAGE_CACHE_DIR': os.path.join(scratch, 'images'),
+                    'RESULT_CACHE_DIR': os.path.join(scratch, 'results')})
+    return env
+
+
+def process_tree(root):
+    # The server process and all of its descendants, by scanning /proc for parent ids
+    parents = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as stat:
+                # The command name may contain spaces; fields after it are space separated
+                fields = stat.read().rsplit(')', 1)[1].split()
+            parents.setdefault(int(fields[1]), []).append(int(name))
+        except (OSError, IndexError):
+            continue
+    tree = [root]
+    for pid in tree:
+        tree.extend(parents.get(pid, []))
+    return tree
+
+
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler(threading.Thread):
+    # Records the peak RSS of every process of the server tree while the load runs
+    def __init__(self, root, interval=0.5):
+        super().__init__(daemon=True)
+        self.root = root
+        self.interval = interval
+        self.peaks = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.sample()
+            self.stopped.wait(self.interval)
+
+    def sample(self):
+        for pid in process_tree(self.root):
+            value = rss_mb(pid)
+            if value is not None:
+                self.peaks[pid] = max(self.peaks.get(pid, 0), value)
+
+    def report(self):
+        workers = [round(self.peaks[pid], 1) for pid in sorted(self.peaks) if pid != self.root]
+        master = round(self.peaks.get(self.root, 0), 1)
+        # A single uvicorn worker serves from the master process itself
+        return {"master": master, "workers": workers or [master], "total": round(sum(self.peaks.values()), 1)}
+
+
+def sample_csv(rows, rng):
+    lines = ["category,sales,cost"] + [f"item {i},{rng.randint(1, 999)},{rng.randint(1, 999)}" for i in range(rows)]
+    return "\n".join(lines).encode('utf-8')
+
+
+def build_requests(args, rng):
+    requests = []
+    for index in range(math.ceil(args.rps * args.duration)):
+        form = {
+            "topic": f"{' '.join(rng.sample(WORDS, 3))} {index}",
+            "theme": rng.choice(THEMES),
+            "variant": rng.choice(VARIANTS),
+            "slideCount": str(rng.choice(args.slide_counts)),
+            "includeImages": "true" if rng.random() < args.image_rate else "false",
+            "exportFormat": "pdf" if rng.random() < args.pdf_rate else "pptx",
+        }
+        files = None
+        if rng.random() < args.csv_rate:
+            form["chartType"] = rng.choice(CHART_TYPES)
+            files = {"csvFile": ("data.csv", sample_csv(args.csv_rows, rng), "text/csv")}
+        requests.append((form, files))
+    return requests
+
+
+async def send_request(client, url, form, files, lag):
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, data=form, files=files)
+        outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+        size = len(response.content)
+    except httpx.TimeoutException:
+        outcome, size = "timeout", 0
+    except httpx.HTTPError as e:
+        outcome, size = type(e).__name__, 0
+    return {"outcome": outcome, "seconds": time.perf_counter() - start, "bytes": size, "lag": lag}
+
+
+async def drive_load(base_url, requests, args, rng):
+    # Open loop: request i is sent at its scheduled time whether or not earlier ones have finished
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        scheduled = 0.0
+        tasks = []
+        for form, files in requests:
+            delay = start + scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = time.perf_counter() - start - scheduled
+            tasks.append(asyncio.create_task(send_request(client, f"{base_url}/generate", form, files, lag)))
+            scheduled += rng.expovariate(args.rps) if args.poisson else 1 / args.rps
+        results = await asyncio.gather(*tasks)
+        return results, time.perf_counter() - start
+
+
+async def warm_up(base_url, count, timeout):
+    # Lazy imports and connection pools are set up by the first requests each worker serves
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        await asyncio.gather(*(client.post(f"{base_url}/generate", data={"topic": f"warm up {i}", "slideCount": "3"})
+                               for i in range(count)))
+
+
+def wait_until_ready(base_url, process, deadline=60):
+    start = time.monotonic()
+    while time.monotonic() - start < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/metrics", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"server did not answer within {deadline}s")
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(fraction * len(ordered)) - 1)], 4)
+
+
+def summarize_run(spec, results, elapsed, sampler, upstream):
+    outcomes = Counter(result["outcome"] for result in results)
+    ok_latencies = [result["seconds"] for result in results if result["outcome"] == "ok"]
+    return {
+        "server": spec,
+        "requests": len(results),
+        "ok": outcomes["ok"],
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(outcomes["ok"] / elapsed, 3) if elapsed else None,
+        "latency_seconds": {
+            "p50": percentile(ok_latencies, 0.50),
+            "p95": percentile(ok_latencies, 0.95),
+            "p99": percentile(ok_latencies, 0.99),
+            "max": percentile(ok_latencies, 1.0),
+        },
+        "errors": {outcome: count for outcome, count in outcomes.items() if outcome != "ok"},
+        "max_send_lag_seconds": round(max((result["lag"] for result in results), default=0), 4),
+        "response_mb": round(sum(result["bytes"] for result in results) / 1024 / 1024, 2),
+        "rss_mb": sampler.report(),
+        "upstream": upstream,
+    }
+
+
+def stub_stats(stub_url):
+    return Counter(httpx.get(f"{stub_url}/stats", timeout=5).json())
+
+
+def wait_until_stub(stub_url, deadline=30):
+    start = time.monotonic()
+    while time.monotonic() - start < deadline:
+        try:
+            stub_stats(stub_url)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("stub server did not start")
+
+
+def run_server(spec, args, stub_url, scratch):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    run_dir = tempfile.mkdtemp(prefix=spec.replace(':', '-') + '-', dir=scratch)
+    log_path = os.path.join(run_dir, 'server.log')
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(server_command(spec, port), cwd=REPO_ROOT, env=server_env(args, stub_url, run_dir),
+                                   stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    sampler = RssSampler(process.pid)
+    try:
+        wait_until_ready(base_url, process)
+        if args.warmup:
+            asyncio.run(warm_up(base_url, args.warmup, args.timeout))
+        before = stub_stats(stub_url)
+        sampler.start()
+        results, elapsed = asyncio.run(drive_load(base_url, build_requests(args, random.Random(args.seed)),
+                                                  args, random.Random(args.seed)))
+        sampler.stopped.set()
+        sampler.join()
+        upstream = dict(stub_stats(stub_url) - before)
+        return summarize_run(spec, results, elapsed, sampler, upstream)
+    except Exception as e:
+        print(f"{spec} failed: {e}; server log at {log_path}", file=sys.stderr)
+        return {"server": spec, "error": str(e), "log": log_path}
+    finally:
+        sampler.stopped.set()
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', action='append', dest='servers',
+                        help='server configuration: sync:WORKERSxTHREADS (gunicorn) or async:WORKERS (uvicorn); repeatable')
+    parser.add_argument('--rps', type=float, default=1.0, help='target request rate')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load per server configuration')
+    parser.add_argument('--poisson', action='store_true', help='exponential inter-arrival times instead of a fixed interval')
+    parser.add_argument('--warmup', type=int, default=2, help='requests sent before measuring')
+    parser.add_argument('--timeout', type=float, default=300, help='client timeout per request (s)')
+    parser.add_argument('--max-connections', type=int, default=1000, help='client keep-alive connections')
+    parser.add_argument('--llm-latency', type=float, default=500, help='stub Gemini latency per call (ms)')
+    parser.add_argument('--image-latency', type=float, default=2000, help='stub Stability latency per call (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub calls answered with 503')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of stub calls answered with 429')
+    parser.add_argument('--image-size', type=int, default=1024, help='edge length of the stub PNG (px)')
+    parser.add_argument('--slide-counts', type=lambda value: [int(part) for part in value.split(',')],
+                        default=[3, 5, 8], help='comma-separated slide counts to draw from')
+    parser.add_argument('--image-rate', type=float, default=0.5, help='fraction of requests with images')
+    parser.add_argument('--pdf-rate', type=float, default=0.3, help='fraction of requests exporting PDF')
+    parser.add_argument('--csv-rate', type=float, default=0.3, help='fraction of requests with a CSV upload')
+    parser.add_argument('--csv-rows', type=int, default=200, help='rows per uploaded CSV')
+    parser.add_argument('--with-caches', action='store_true', help='keep the server caches and request coalescing enabled')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the request mix')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+    servers = args.servers or ['sync:2x4', 'async:1']
+
+    scratch = tempfile.mkdtemp(prefix='presentation-loadtest-')
+    stub_port = free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    stub = multiprocessing.Process(target=run_stub, args=(stub_port, args), daemon=True)
+    stub.start()
+    try:
+        wait_until_stub(stub_url)
+        runs = []
+        for spec in servers:
+            print(f"Running {spec} at {args.rps} rps for {args.duration}s", file=sys.stderr)
+            runs.append(run_server(spec, args, stub_url, scratch))
+    finally:
+        stub.terminate()
+
+    report = {"config": vars(args), "scratch_dir": scratch, "runs": runs}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+    return 0 if all("error" not in run for run in runs) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
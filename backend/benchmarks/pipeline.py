@@ -0,0 +1,242 @@
+"""Offline benchmark of the full generation pipeline with fake Gemini and Stability backends.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.pipeline --llm-latency 50 --image-latency 200 --output bench.json
+
+Every case drives create_presentation_stream (the /generate hot path) with deterministic fake
+providers and reports wall time, CPU time, peak RSS, output size and a per-stage breakdown.
+Each case runs in a fresh interpreter, so its peak RSS is not inflated by the cases before it.
+"""
+import argparse
+import base64
+import functools
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import resource
+import threading
+import time
+from io import BytesIO
+
+os.environ.setdefault('GENAI_API_KEY', 'benchmark')
+os.environ.setdefault('STABILITY_API_KEY', 'benchmark')
+
+from PIL import Image
+from pptx.presentation import Presentation as PresentationPart
+
+from backend import app as presentation_app
+
+STAGES = [
+    "generate_slide_titles",
+    "generate_outline",
+    "generate_slide_content",
+    "generate_image",
+    "read_chart_data",
+    "generate_chart",
+    "render_pptx",
+    "render_pdf",
+]
+
+WORDS = ("data model growth market system design impact users cloud process value team "
+         "strategy research quality platform network risk future insight").split()
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeTextModel:
+    # Deterministic stand-in for genai.GenerativeModel with configurable latency and payload size
+    def __init__(self, latency, words):
+        self.latency = latency
+        self.words = words
+
+    def sentence(self, rng, count):
+        return " ".join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+    def generate_content(self, prompt, generation_config=None, request_options=None):
+        time.sleep(self.latency)
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+        if "JSON" in prompt:
+            count = int(prompt.split("exactly ")[1].split()[0])
+            slides = [{"title": f"{self.sentence(rng, 4)} {i}", "content": self.sentence(rng, self.words)}
+                      for i in range(count)]
+            return FakeResponse(json.dumps({"slides": slides}))
+        if "slide titles" in prompt:
+            count = int(prompt.split("exactly ")[1].split()[0])
+            return FakeResponse("\n".join(f"{self.sentence(rng, 4)} {i}" for i in range(count)))
+        if "bullet points" in prompt:
+            return FakeResponse("\n".join(f"- {self.sentence(rng, self.words // 6 or 1)}" for _ in range(6)))
+        return FakeResponse(f"{self.sentence(rng, self.words // 2 or 1)}\n\n{self.sentence(rng, self.words // 2 or 1)}")
+
+
+def fake_image_payload(size):
+    rng = random.Random(size)
+    image = Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3))
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return {"artifacts": [{"base64": base64.b64encode(buffer.getvalue()).decode('ascii')}]}
+
+
+class StageTimer:
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return timed
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: {"seconds": round(self.totals[name], 4), "calls": self.counts[name]}
+                    for name in self.totals}
+
+
+def install_fakes(args, timer):
+    model = FakeTextModel(args.llm_latency / 1000, args.content_words)
+    image_payload = fake_image_payload(args.image_size)
+    image_latency = args.image_latency / 1000
+
+    def fake_post_json(url, payload, headers, circuit, *_args, **_kwargs):
+        # Quota and priority arguments are ignored, the fake upstream never throttles
+        time.sleep(image_latency)
+        return image_payload
+
+    presentation_app.get_text_model = lambda model_name=presentation_app.TEXT_MODEL_NAME: model
+    presentation_app.post_json = fake_post_json
+    if not args.with_caches:
+        presentation_app.llm_cache = None
+        presentation_app.image_cache = None
+
+    for name in STAGES:
+        setattr(presentation_app, name, timer.wrap(name, getattr(presentation_app, name)))
+    PresentationPart.save = timer.wrap("pptx_save", PresentationPart.save)
+
+
+def sample_csv(rows):
+    lines = ["category,value"] + [f"item {i},{(i * 37) % 101}" for i in range(rows)]
+    return "\n".join(lines).encode('utf-8')
+
+
+def build_cases(args):
+    themes = [(theme, variant) for theme, info in presentation_app.THEMES.items() for variant in info["variants"]]
+    if args.full:
+        for slides, (theme, variant), images, chart, export_format in itertools.product(
+                (3, 5, 10), themes, (True, False), (None, "bar"), ("pptx", "pdf")):
+            yield {"slides": slides, "theme": theme, "variant": variant, "images": images,
+                   "chart": chart, "export_format": export_format}
+        return
+    
+    for slides, images in itertools.product((3, 5, 10), (True, False)):
+        yield {"slides": slides, "theme": "corporate", "variant": "professional", "images": images,
+               "chart": None, "export_format": "pptx"}
+    for theme, variant in themes:
+        yield {"slides": 5, "theme": theme, "variant": variant, "images": True,
+               "chart": None, "export_format": "pptx"}
+    for chart_type in presentation_app.CHART_TYPES:
+        yield {"slides": 5, "theme": "corporate", "variant": "professional", "images": False,
+               "chart": chart_type, "export_format": "pptx"}
+    for slides in (3, 5, 10):
+        yield {"slides": slides, "theme": "corporate", "variant": "professional", "images": True,
+               "chart": "bar", "export_format": "pdf"}
+
+
+def run_case(case, args, timer, baseline_rss_kb):
+    csv_file = BytesIO(sample_csv(args.csv_rows)) if case["chart"] else None
+    timer.totals.clear()
+    timer.counts.clear()
+    
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    stream, extension = presentation_app.create_presentation_stream(
+        topic="Benchmark Topic",
+        csv_file=csv_file,
+        theme=case["theme"],
+        variant=case["variant"],
+        include_images=case["images"],
+        chart_type=case["chart"] or "bar",
+        export_format=case["export_format"],
+        slide_count=case["slides"],
+        batch_outline=args.batch_outline,
+    )
+    output_bytes = stream.seek(0, os.SEEK_END)
+    stream.close()
+    
+    return {
+        **case,
+        "extension": extension,
+        "wall_seconds": round(time.perf_counter() - wall_start, 4),
+        "cpu_seconds": round(time.process_time() - cpu_start, 4),
+        # ru_maxrss is the peak of the whole process: the imports (baseline_rss_kb) plus every run
+        # of this case so far
+        "baseline_rss_kb": baseline_rss_kb,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "output_bytes": output_bytes,
+        "stages": timer.snapshot(),
+    }
+
+
+def run_case_process(case, args):
+    timer = StageTimer()
+    install_fakes(args, timer)
+    baseline_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return [run_case(case, args, timer, baseline_rss_kb) for _ in range(args.repeat)]
+
+
+def run_isolated(case, args):
+    # A spawned interpreter starts with its own RSS high-water mark; a forked one would inherit ours
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case_process, (case, args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--llm-latency', type=float, default=0, help='fake Gemini latency per call (ms)')
+    parser.add_argument('--image-latency', type=float, default=0, help='fake Stability latency per call (ms)')
+    parser.add_argument('--content-words', type=int, default=60, help='words per fake slide body')
+    parser.add_argument('--image-size', type=int, default=1024, help='edge length of the fake PNG (px)')
+    parser.add_argument('--csv-rows', type=int, default=50, help='rows in the generated chart CSV')
+    parser.add_argument('--batch-outline', action='store_true', help='use the single-call outline mode')
+    parser.add_argument('--with-caches', action='store_true', help='keep the LLM and image caches enabled')
+    parser.add_argument('--full', action='store_true', help='run the full slides x theme x images x chart x format matrix')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+    
+    results = []
+    for case in build_cases(args):
+        results.extend(run_isolated(case, args))
+    
+    report = {
+        "config": vars(args),
+        "generation_concurrency": presentation_app.GENERATION_CONCURRENCY,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Per-slide build time with and without the cached slide decorations.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.slide_build --slides 200
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('GENAI_API_KEY', 'benchmark')
+
+from pptx import Presentation
+
+from backend.app import THEMES, apply_gradient, add_design_elements, apply_variant_styling, decorate_slide
+
+
+def build_uncached(slide, theme, variant, is_title_slide):
+    selected_theme = THEMES[theme]
+    variant_info = selected_theme["variants"][variant]
+    apply_gradient(slide, selected_theme["gradient_start"], selected_theme["gradient_end"])
+    add_design_elements(slide, selected_theme, variant_info)
+    apply_variant_styling(slide, selected_theme, variant_info, is_title_slide=is_title_slide)
+
+
+def build_cached(slide, theme, variant, is_title_slide):
+    decorate_slide(slide, theme, variant, is_title_slide)
+
+
+def time_per_slide(build, theme, variant, slides):
+    prs = Presentation()
+    # Warm up once so the cached path is measured after its one-time fragment build
+    build(prs.slides.add_slide(prs.slide_layouts[6]), theme, variant, True)
+    build(prs.slides.add_slide(prs.slide_layouts[6]), theme, variant, False)
+    
+    start = time.perf_counter()
+    for i in range(slides):
+        build(prs.slides.add_slide(prs.slide_layouts[6]), theme, variant, i == 0)
+    return (time.perf_counter() - start) / slides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--slides', type=int, default=100, help='slides built per theme/variant and mode')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    
+    results = []
+    for theme, theme_info in THEMES.items():
+        for variant in theme_info["variants"]:
+            before = time_per_slide(build_uncached, theme, variant, args.slides)
+            after = time_per_slide(build_cached, theme, variant, args.slides)
+            results.append({
+                "theme": theme,
+                "variant": variant,
+                "before_us": round(before * 1e6, 1),
+                "after_us": round(after * 1e6, 1),
+                "speedup": round(before / after, 2) if after else None,
+            })
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{'theme':<10} {'variant':<13} {'before (us)':>12} {'after (us)':>11} {'speedup':>8}")
+    for row in results:
+        print(f"{row['theme']:<10} {row['variant']:<13} {row['before_us']:>12} {row['after_us']:>11} {row['speedup']:>7}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Cold-start benchmark for backend.app: import time, first-request latency and worker RSS.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.startup --repeat 5 --output startup.json
+
+Every sample imports the app in a fresh interpreter, the way each gunicorn worker does on boot or
+restart, then serves one request through the test client. The report also lists which heavy
+optional modules ended up loaded and, with --top, the slowest imports from python -X importtime.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "numpy", "fpdf", "google.generativeai", "grpc", "requests", "PIL", "pptx.chart.data"]
+
+# Runs inside the child interpreter; prints one JSON line
+PROBE = """
+import json, os, sys, time
+
+def rss_kb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+baseline = rss_kb()
+start = time.perf_counter()
+from backend import app as presentation_app
+imported = time.perf_counter()
+after_import = rss_kb()
+response = presentation_app.app.test_client().get(PATH)
+served = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_request_seconds": served - imported,
+    "status": response.status_code,
+    "baseline_rss_kb": baseline,
+    "import_rss_kb": after_import,
+    "first_request_rss_kb": rss_kb(),
+    "loaded": [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault('GENAI_API_KEY', 'benchmark')
+    env.setdefault('STABILITY_API_KEY', 'benchmark')
+    return env
+
+
+def run_sample(path):
+    code = f"PATH = {path!r}\nHEAVY = {HEAVY_MODULES!r}\n" + PROBE
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            env=child_env(), check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(count):
+    # -X importtime writes "import time: self | cumulative | name" lines to stderr
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import backend.app'],
+                            capture_output=True, text=True, env=child_env(), check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append({"module": parts[2].strip(), "cumulative_ms": int(parts[1]) / 1000})
+    # Only packages, otherwise one slow package shows up once per submodule
+    top_level = [row for row in rows if '.' not in row["module"]]
+    return sorted(top_level, key=lambda row: row["cumulative_ms"], reverse=True)[:count]
+
+
+def summarize(values):
+    return {
+        "median": round(statistics.median(values), 4),
+        "min": round(min(values), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters to sample')
+    parser.add_argument('--path', default='/metrics', help='endpoint served as the first request')
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to report (0 to skip)')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    samples = [run_sample(args.path) for _ in range(args.repeat)]
+    report = {
+        "python": sys.version.split()[0],
+        "samples": args.repeat,
+        "import_seconds": summarize([sample["import_seconds"] for sample in samples]),
+        "first_request_seconds": summarize([sample["first_request_seconds"] for sample in samples]),
+        "rss_mb": {
+            "interpreter": round(statistics.median(sample["baseline_rss_kb"] for sample in samples) / 1024, 1),
+            "after_import": round(statistics.median(sample["import_rss_kb"] for sample in samples) / 1024, 1),
+            "after_first_request": round(statistics.median(sample["first_request_rss_kb"] for sample in samples) / 1024, 1),
+        },
+        "heavy_modules_loaded": samples[-1]["loaded"],
+    }
+    if args.top:
+        report["slowest_imports"] = slowest_imports(args.top)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
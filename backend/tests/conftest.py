@@ -0,0 +1,140 @@
+import base64
+import os
+import sys
+import tempfile
+import threading
+import time
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+
+# backend/app.py reads its configuration at import time, so every path it writes to is pointed at a
+# scratch directory before the module is imported
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+SCRATCH = tempfile.mkdtemp(prefix="presentation-tests-")
+for name, value in {
+    "GENAI_API_KEY": "test-key",
+    "STABILITY_API_KEY": "test-key",
+    "ARTIFACT_DIR": os.path.join(SCRATCH, "artifacts"),
+    "IMAGE_CACHE_DIR": os.path.join(SCRATCH, "images"),
+    "RESULT_CACHE_DIR": os.path.join(SCRATCH, "results"),
+    "DECK_DIR": os.path.join(SCRATCH, "decks"),
+    "JOB_DB_PATH": os.path.join(SCRATCH, "jobs.sqlite3"),
+    "RATE_LIMIT_DB_PATH": os.path.join(SCRATCH, "rate_limits.sqlite3"),
+    "SIMILAR_TOPIC_DB_PATH": os.path.join(SCRATCH, "topics.sqlite3"),
+    "LLM_CACHE_BACKEND": "memory",
+    "TEXT_PROVIDER": "gemini",
+    "TEXT_PROVIDER_FALLBACK": "",
+    "BATCH_OUTLINE": "false",
+    "SIMILAR_TOPICS": "false",
+}.items():
+    os.environ[name] = value
+
+from backend import app as presentation_app  # noqa: E402
+
+
+def png_bytes():
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new("RGB", (64, 64), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class StubBackend:
+    # Stands in for both the Gemini model and the Stability HTTP session. Every call sleeps for
+    # `latency` seconds and the peak number of overlapping calls is recorded.
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.fail_content = False
+        self.image_status = 200
+        self.image_b64 = base64.b64encode(png_bytes()).decode("ascii")
+        self._lock = threading.Lock()
+
+    def _enter(self, kind):
+        with self._lock:
+            self.calls.append(kind)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+
+    def _leave(self):
+        with self._lock:
+            self.active -= 1
+
+    def count(self, kind):
+        with self._lock:
+            return self.calls.count(kind)
+
+    def generate_content(self, prompt, generation_config=None, request_options=None):
+        kind = "titles" if "slide titles" in prompt else "outline" if "JSON" in prompt else "content"
+        self._enter(kind)
+        try:
+            if kind == "titles":
+                return SimpleNamespace(text="Origins\nKey Ideas\nApplications\nChallenges\nFuture\nImpact")
+            if kind == "outline":
+                return SimpleNamespace(text='{"slides": []}')
+            if self.fail_content:
+                raise ValueError("stubbed content failure")
+            return SimpleNamespace(text="- point one\n- point two\n- point three")
+        finally:
+            self._leave()
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self._enter("image")
+        try:
+            return StubResponse(self.image_status, {"artifacts": [{"base64": self.image_b64}]})
+        finally:
+            self._leave()
+
+
+class StubResponse:
+    def __init__(self, status_code, payload, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def app_module():
+    return presentation_app
+
+
+@pytest.fixture
+def stub_backend(monkeypatch, tmp_path):
+    # Fresh caches and circuits per test, with every upstream call answered by a StubBackend
+    stub = StubBackend()
+    monkeypatch.setattr(presentation_app, "get_text_model", lambda model_name=None: stub)
+    monkeypatch.setattr(presentation_app, "get_http_session", lambda: stub)
+    monkeypatch.setattr(presentation_app, "llm_cache",
+                        presentation_app.MemoryCache(presentation_app.LLM_CACHE_TTL, presentation_app.LLM_CACHE_MAX_ENTRIES))
+    monkeypatch.setattr(presentation_app, "image_cache",
+                        presentation_app.DiskLRUStore(str(tmp_path / "images"), 64 * 1024 * 1024, ".img"))
+    monkeypatch.setattr(presentation_app, "result_cache",
+                        presentation_app.DiskLRUStore(str(tmp_path / "results"), 64 * 1024 * 1024))
+    for name in ("gemini_circuit", "stability_circuit", "openai_circuit"):
+        monkeypatch.setattr(presentation_app, name, presentation_app.CircuitBreaker(name.split("_")[0]))
+    for name in ("gemini_limiter", "stability_limiter", "openai_limiter"):
+        limiter = getattr(presentation_app, name)
+        monkeypatch.setattr(presentation_app, name, presentation_app.RateLimiter(
+            limiter.name, limiter.rpm, limiter.tpm, str(tmp_path / "rate_limits.sqlite3")))
+    monkeypatch.setattr(presentation_app, "HTTP_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(presentation_app, "RATE_LIMIT_BLOCK_SECONDS", 0.01)
+    return stub
+
+
+@pytest.fixture
+def client(stub_backend):
+    return presentation_app.app.test_client()
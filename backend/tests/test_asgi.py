@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import httpx
+
+from backend import asgi
+
+
+class ThreadRecordingCache:
+    # Wraps a cache and records which thread each call ran on
+    def __init__(self, cache):
+        self.cache = cache
+        self.threads = []
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def call(*args):
+            self.threads.append(threading.current_thread().name)
+            return method(*args)
+        return call
+
+
+class StubAsyncClient:
+    def __init__(self, payload):
+        self.payload = payload
+        self.posts = 0
+
+    async def post(self, url, headers=None, json=None):
+        self.posts += 1
+        return httpx.Response(200, json=self.payload, request=httpx.Request("POST", url))
+
+
+def gemini_client():
+    return StubAsyncClient({"candidates": [{"content": {"parts": [{"text": "Answer"}]}}]})
+
+
+async def generate_twice(client):
+    return [await asgi.generate_text_async(client, "Question", provider="gemini") for _ in range(2)]
+
+
+def test_sqlite_llm_cache_runs_on_the_io_pool(app_module, stub_backend, monkeypatch, tmp_path):
+    cache = ThreadRecordingCache(app_module.SQLiteCache(str(tmp_path / "llm.sqlite3"), 60, 100))
+    monkeypatch.setattr(app_module, "llm_cache", cache)
+    client = gemini_client()
+
+    assert asyncio.run(generate_twice(client)) == ["Answer", "Answer"]
+    assert client.posts == 1
+    assert len(cache.threads) == 3
+    assert all(name.startswith("asgi-io") for name in cache.threads)
+
+
+def test_memory_llm_cache_is_called_inline(app_module, stub_backend, monkeypatch):
+    threads = []
+
+    class RecordingMemoryCache(app_module.MemoryCache):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+    monkeypatch.setattr(app_module, "llm_cache", RecordingMemoryCache(60, 100))
+    asyncio.run(generate_twice(gemini_client()))
+    assert threads == [threading.main_thread()] * 2
+
+
+def test_image_cache_hits_run_on_the_io_pool(app_module, stub_backend, monkeypatch):
+    assert app_module.generate_image("A blue square") is not None
+    cache = ThreadRecordingCache(app_module.image_cache)
+    monkeypatch.setattr(app_module, "image_cache", cache)
+
+    cached_path = asyncio.run(asgi.generate_image_async(None, "A blue square"))
+    assert isinstance(cached_path, str) and cached_path.endswith(".img")
+    assert cache.threads and all(name.startswith("asgi-io") for name in cache.threads)
+
+
+def test_quota_waits_run_on_their_own_pool(app_module, stub_backend, monkeypatch):
+    threads = []
+    monkeypatch.setattr(app_module.gemini_limiter, "acquire",
+                        lambda tokens=0, priority=None: threads.append(threading.current_thread().name) or 0)
+    asyncio.run(asgi.generate_text_async(gemini_client(), "Question", provider="gemini"))
+    assert len(threads) == 1 and threads[0].startswith("asgi-limiter")
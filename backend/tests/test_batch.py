@@ -0,0 +1,23 @@
+import json
+import zipfile
+from io import BytesIO
+
+from backend import batch
+
+
+def test_specs_with_unknown_themes_are_reported_as_failures(tmp_path):
+    specs = tmp_path / "specs.jsonl"
+    specs.write_text('{"topic": "A", "theme": "modern"}\n\nnot json\n{"topic": "B", "theme": "bold"}\n')
+    parsed = list(batch.read_specs(str(specs)))
+    assert isinstance(parsed[0], ValueError) and "unknown theme 'modern'" in str(parsed[0])
+    assert isinstance(parsed[1], ValueError) and str(parsed[1]).startswith("line 3:")
+    assert parsed[2] == {"topic": "B", "theme": "bold"}
+
+
+def test_batch_zip_keeps_going_after_a_failed_deck(app_module, stub_backend):
+    specs = [{"topic": "First", "slideCount": 3, "includeImages": False}, ValueError("line 2: broken"),
+             {"slideCount": 3}]
+    archive = zipfile.ZipFile(BytesIO(b"".join(app_module.iter_batch_zip(specs, workers=2))))
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [deck["status"] for deck in manifest["decks"]] == ["ok", "error", "error"]
+    assert archive.read(manifest["decks"][0]["file"])[:2] == b"PK"
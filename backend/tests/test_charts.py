@@ -0,0 +1,48 @@
+from io import BytesIO
+
+
+class RecordingPDF:
+    # Just enough of the FPDF drawing API for draw_pdf_chart
+    def __init__(self):
+        self.rects = []
+
+    def rect(self, x, y, w, h, style=""):
+        self.rects.append((x, y, w, h))
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def csv_upload(text):
+    return BytesIO(text.encode("utf-8"))
+
+
+def test_bar_chart_keeps_top_categories_and_folds_the_rest(app_module):
+    rows = "\n".join(f"item {index},{index}" for index in range(100))
+    data = app_module.read_chart_data(csv_upload(f"name,value\n{rows}\nitem 99,1"), "bar", max_points=5)
+    assert data["categories"] == ["item 96", "item 97", "item 98", "item 99", "Other"]
+    assert data["series"][0][1][3] == 100
+    assert data["series"][0][1][4] == sum(range(96))
+
+
+def test_line_chart_is_downsampled_to_the_point_budget(app_module):
+    rows = "\n".join(f"{index},{index % 17},{index % 5}" for index in range(5000))
+    data = app_module.read_chart_data(csv_upload(f"day,a,b\n{rows}"), "line", max_points=50)
+    assert len(data["categories"]) == 50
+    assert [name for name, _ in data["series"]] == ["a", "b"]
+    assert data["categories"][0] == "0" and data["categories"][-1] == "4999"
+
+
+def test_pdf_scatter_places_points_by_x_value(app_module):
+    chart = {"chart_type": "scatter", "data": {"categories": [0.0, 1.0, 10.0], "series": [("y", [1.0, 1.0, 1.0])]}}
+    pdf = RecordingPDF()
+    app_module.draw_pdf_chart(pdf, chart, 0, 0, 100, 100)
+    centres = [round(rect_x + rect_w / 2, 3) for rect_x, _, rect_w, _ in pdf.rects]
+    assert centres == [0, 10, 100]
+
+
+def test_pdf_line_chart_spaces_categories_evenly(app_module):
+    chart = {"chart_type": "line", "data": {"categories": ["a", "b"], "series": [("y", [1.0, 2.0])]}}
+    pdf = RecordingPDF()
+    app_module.draw_pdf_chart(pdf, chart, 0, 0, 100, 100)
+    assert [round(rect_x + rect_w / 2, 3) for rect_x, _, rect_w, _ in pdf.rects] == [25, 75]
@@ -0,0 +1,170 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def generate_form(topic="Robots", **fields):
+    return {"topic": topic, "slideCount": "4", "includeImages": "false", **fields}
+
+
+def test_generate_returns_a_deck(client, stub_backend):
+    response = client.post("/generate", data=generate_form())
+    assert response.status_code == 200
+    assert response.data[:2] == b"PK"
+    assert response.headers["ETag"]
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert stub_backend.count("titles") == 1
+
+
+def test_generate_requires_a_topic_or_file(client):
+    response = client.post("/generate", data={"slideCount": "4"})
+    assert response.status_code == 400
+
+
+def test_repeated_generation_is_served_from_the_result_cache(client, stub_backend):
+    first = client.post("/generate", data=generate_form())
+    calls = len(stub_backend.calls)
+    second = client.post("/generate", data=generate_form(topic="  Robots "))
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(stub_backend.calls) == calls
+
+
+def test_matching_etag_gets_not_modified(client, stub_backend):
+    etag = client.post("/generate", data=generate_form()).headers["ETag"]
+    calls = len(stub_backend.calls)
+    response = client.post("/generate", data=generate_form(), headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert len(stub_backend.calls) == calls
+
+
+def test_range_requests_are_honoured(client):
+    full = client.post("/generate", data=generate_form())
+    partial = client.post("/generate", data=generate_form(), headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.data == full.data[100:200]
+    unsatisfiable = client.post("/generate", data=generate_form(), headers={"Range": f"bytes={len(full.data) + 10}-"})
+    assert unsatisfiable.status_code == 416
+
+
+def test_identical_concurrent_requests_are_coalesced(app_module, stub_backend):
+    stub_backend.latency = 0.2
+
+    def post(topic):
+        response = app_module.app.test_client().post("/generate", data=generate_form(topic))
+        return response.status_code, response.data
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(post, ["Coalesced", "Coalesced ", "Coalesced", "Other topic"]))
+
+    assert [status for status, _ in results] == [200] * 4
+    assert results[0][1] == results[1][1] == results[2][1]
+    assert stub_backend.count("titles") == 2
+
+
+def test_deck_lifecycle(client, stub_backend):
+    created = client.post("/decks", data=generate_form(slideCount="4"))
+    assert created.status_code == 201
+    deck = created.get_json()
+    deck_id = deck["deck_id"]
+    assert [slide["title"] for slide in deck["slides"]] == ["Origins", "Key Ideas", "Applications", "Robots Future"]
+
+    calls = len(stub_backend.calls)
+    regenerated = client.post(f"/decks/{deck_id}/slides/1/regenerate", json={"title": "New Ideas"})
+    assert regenerated.status_code == 200
+    assert regenerated.get_json()["slides"][1]["title"] == "New Ideas"
+    # A single-slide tweak costs one content call
+    assert stub_backend.calls[calls:] == ["content"]
+
+    edited = client.patch(f"/decks/{deck_id}/slides/0", json={"content": "Hand written"})
+    assert edited.get_json()["slides"][0]["content"] == "Hand written"
+
+    reordered = client.put(f"/decks/{deck_id}/order", json={"order": [3, 2, 1, 0]})
+    assert [slide["title"] for slide in reordered.get_json()["slides"]] == ["Robots Future", "Applications", "New Ideas", "Origins"]
+    assert reordered.get_json()["version"] == 4
+
+    download = client.get(f"/decks/{deck_id}/download")
+    assert download.status_code == 200
+    assert download.data[:2] == b"PK"
+    assert client.get(f"/decks/{deck_id}/download?format=pdf").data[:4] == b"%PDF"
+
+
+def test_unknown_deck_is_not_found(client):
+    assert client.get("/decks/" + "0" * 32).status_code == 404
+    assert client.put("/decks/" + "0" * 32 + "/order", json={"order": [0]}).status_code == 404
+
+
+def test_reorder_rejects_anything_but_a_permutation(client):
+    deck_id = client.post("/decks", data=generate_form(slideCount="3")).get_json()["deck_id"]
+    for order in ([0, "1", 2], [True, 0, 2], [0, 1], [0, 0, 1], [0, 1, 2.0], "012", None, [0, 1, None]):
+        response = client.put(f"/decks/{deck_id}/order", json={"order": order})
+        assert response.status_code == 400, order
+    assert client.put(f"/decks/{deck_id}/order", json={"order": [2, 0, 1]}).status_code == 200
+
+
+def test_sweep_only_removes_idle_flight_locks(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "ARTIFACT_DIR", str(tmp_path))
+    held_path, idle_path = str(tmp_path / "flight-held.lock"), str(tmp_path / "flight-idle.lock")
+    with open(held_path, "a") as held, open(idle_path, "a") as idle:
+        assert app_module.try_flight_lock(held)
+        for path in (held_path, idle_path):
+            os.utime(path, (0, 0))
+
+        app_module.sweep_artifacts(max_age=60)
+
+        assert os.path.exists(held_path)
+        assert not os.path.exists(idle_path)
+        # A waiter that had the removed file open must not treat its lock as valid
+        assert app_module.try_flight_lock(idle)
+        assert not app_module.flight_lock_is_current(idle, idle_path)
+        assert app_module.flight_lock_is_current(held, held_path)
+
+
+def test_decks_with_fallbacks_are_not_cached(client, stub_backend):
+    stub_backend.fail_content = True
+    first = client.post("/generate", data=generate_form("Flaky"))
+    assert first.status_code == 200
+    assert "ETag" not in first.headers
+
+    stub_backend.fail_content = False
+    calls = stub_backend.count("content")
+    second = client.post("/generate", data=generate_form("Flaky"))
+    assert stub_backend.count("content") > calls
+    assert second.headers["ETag"]
+
+
+def test_etag_changes_with_the_render_date(client, app_module, monkeypatch):
+    today = client.post("/generate", data=generate_form()).headers["ETag"]
+    monkeypatch.setattr(app_module.time, "strftime", lambda fmt, *args: "2999-01-01")
+    tomorrow = client.post("/generate", data=generate_form(), headers={"If-None-Match": today})
+    assert tomorrow.status_code == 200
+    assert tomorrow.headers["ETag"] != today
+
+
+def test_result_cache_entries_expire(app_module, tmp_path):
+    store = app_module.DiskLRUStore(str(tmp_path), 1024 * 1024, max_age=60)
+    path = store.put("deck.pptx", b"deck")
+    assert store.get("deck.pptx") == path
+    os.utime(path, (time.time(), time.time() - 120))
+    assert store.get("deck.pptx") is None
+    assert not os.path.exists(path)
+
+
+def test_disk_store_evicts_least_recently_read(app_module, tmp_path):
+    store = app_module.DiskLRUStore(str(tmp_path), 10)
+    old = store.put("old", b"12345")
+    os.utime(old, (time.time() - 100, time.time() - 100))
+    store.put("new", b"12345")
+    os.utime(store.path_for("new"), (time.time() - 50, time.time() - 50))
+    store.get("old")
+    store.put("third", b"12345")
+    assert store.get("old") and store.get("third") and not store.get("new")
+
+
+def test_deck_without_a_model_is_not_found(client, app_module):
+    deck_id = client.post("/decks", data=generate_form(slideCount="3")).get_json()["deck_id"]
+    os.remove(app_module.deck_store.path_for(deck_id, "deck.json"))
+    assert client.patch(f"/decks/{deck_id}/slides/0", json={"title": "Edited"}).status_code == 404
+    assert client.post(f"/decks/{deck_id}/slides/0/regenerate", json={}).status_code == 404
+    assert client.put(f"/decks/{deck_id}/order", json={"order": [2, 0, 1]}).status_code == 404
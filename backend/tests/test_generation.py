@@ -0,0 +1,80 @@
+import time
+
+
+def test_slide_fan_out_runs_concurrently(app_module, stub_backend):
+    stub_backend.latency = 0.2
+    titles = [f"Slide {index}" for index in range(8)]
+
+    start = time.perf_counter()
+    assets = app_module.generate_slide_assets(titles, include_images=True, max_workers=8)
+    elapsed = time.perf_counter() - start
+
+    # 8 content calls and 4 images would take 2.4s back to back; each slide is one content -> image chain
+    assert stub_backend.count("content") == 8
+    assert stub_backend.count("image") == 4
+    assert stub_backend.peak > 1
+    assert elapsed < 1.2
+    assert [content for content, _ in assets] == [app_module.process_bullet_points("- point one\n- point two\n- point three")] * 8
+    assert [image is not None for _, image in assets] == [index % 2 == 0 for index in range(8)]
+
+
+def test_fan_out_respects_the_concurrency_limit(app_module, stub_backend):
+    stub_backend.latency = 0.05
+    app_module.generate_slide_assets([f"Slide {index}" for index in range(6)], include_images=False, max_workers=2)
+    assert stub_backend.peak <= 2
+
+
+def test_deck_keeps_slide_order(app_module, stub_backend):
+    deck = app_module.generate_deck("Robots", include_images=False, slide_count=5)
+    assert [slide["title"] for slide in deck["slides"]] == ["Origins", "Key Ideas", "Applications", "Robots Future", "Robots Implementation"]
+    assert stub_backend.count("titles") == 1
+
+
+def test_llm_cache_serves_repeated_prompts(app_module, stub_backend):
+    first = app_module.generate_slide_content("Cached slide", has_image=True)
+    second = app_module.generate_slide_content("Cached slide", has_image=True)
+    assert first == second
+    assert stub_backend.count("content") == 1
+    assert app_module.llm_cache.stats()["hits"] == 1
+
+
+def test_image_cache_serves_repeated_prompts(app_module, stub_backend):
+    first = app_module.generate_image("A red square")
+    second = app_module.generate_image("a  RED square")
+    assert first is not None
+    assert isinstance(second, str) and second.endswith(".img")
+    assert stub_backend.count("image") == 1
+
+
+def test_retryable_image_errors_are_retried(app_module, stub_backend, monkeypatch):
+    statuses = [503, 429, 200]
+    post = stub_backend.post
+
+    def flaky_post(*args, **kwargs):
+        response = post(*args, **kwargs)
+        response.status_code = statuses.pop(0)
+        return response
+
+    monkeypatch.setattr(stub_backend, "post", flaky_post)
+    assert app_module.generate_image("Flaky upstream") is not None
+    assert stub_backend.count("image") == 3
+
+
+def test_open_circuit_falls_back_without_calling_upstream(app_module, stub_backend):
+    stub_backend.image_status = 503
+    threshold = app_module.stability_circuit.failure_threshold
+    for _ in range(threshold):
+        assert app_module.generate_image("Broken upstream", refresh=True) is None
+    calls = stub_backend.count("image")
+
+    assert app_module.generate_image("Broken upstream", refresh=True) is None
+    assert stub_backend.count("image") == calls
+
+
+def test_local_provider_skips_the_batched_outline(app_module, stub_backend):
+    outline_fallbacks = app_module.fallbacks.values.get(("outline",), 0)
+    deck = app_module.generate_deck("Solar power", include_images=False, slide_count=4, batch_outline=True,
+                                    provider="local")
+    assert len(deck["slides"]) == 4
+    assert app_module.fallbacks.values.get(("outline",), 0) == outline_fallbacks
+    assert stub_backend.calls == []
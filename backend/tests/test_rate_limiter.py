@@ -0,0 +1,57 @@
+import time
+
+
+def limiter_pair(app_module, tmp_path, rpm=6000):
+    # Two limiters on one database behave like the same limiter in two worker processes
+    path = str(tmp_path / "rate_limits.sqlite3")
+    return app_module.RateLimiter("test", rpm, path=path), app_module.RateLimiter("test", rpm, path=path)
+
+
+def test_requests_per_minute_are_enforced(app_module, tmp_path):
+    limiter = app_module.RateLimiter("test", 60, path=str(tmp_path / "rate_limits.sqlite3"))
+    for _ in range(60):
+        assert limiter.acquire() < 0.05
+    assert 0.5 < limiter.acquire() < 1.5
+
+
+def test_retry_after_blocks_every_worker(app_module, tmp_path):
+    first, second = limiter_pair(app_module, tmp_path)
+    first.acquire()
+    first.drain(retry_after=0.3)
+    start = time.monotonic()
+    second.acquire()
+    assert time.monotonic() - start >= 0.25
+
+
+def test_block_window_grows_with_consecutive_throttling(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "RATE_LIMIT_BLOCK_SECONDS", 0.1)
+    first, second = limiter_pair(app_module, tmp_path)
+
+    def blocked_for():
+        return first._connect().execute("SELECT blocked_until FROM rate_blocks WHERE name = 'test'").fetchone()[0] - time.time()
+
+    first.drain()
+    assert 0.05 < blocked_for() <= 0.1
+    # 429s for calls already in flight when the block began do not extend it
+    second.drain()
+    assert blocked_for() <= 0.1
+    second.acquire()
+    first.drain()
+    assert 0.15 < blocked_for() <= 0.2
+
+
+def test_throttled_upstream_blocks_later_calls(app_module, stub_backend, monkeypatch):
+    statuses = [429, 200]
+    post = stub_backend.post
+
+    def throttled_post(*args, **kwargs):
+        response = post(*args, **kwargs)
+        response.status_code = statuses.pop(0)
+        if response.status_code == 429:
+            response.headers["Retry-After"] = "0.3"
+        return response
+
+    monkeypatch.setattr(stub_backend, "post", throttled_post)
+    start = time.monotonic()
+    assert app_module.generate_image("Throttled upstream") is not None
+    assert time.monotonic() - start >= 0.25
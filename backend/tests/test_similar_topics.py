@@ -0,0 +1,93 @@
+import itertools
+import random
+import statistics
+import time
+
+import pytest
+
+
+@pytest.fixture
+def index(app_module, tmp_path, monkeypatch):
+    similar = app_module.SimilarTopicIndex(str(tmp_path / "topics.sqlite3"), app_module.SIMILAR_TOPIC_THRESHOLD)
+    monkeypatch.setattr(app_module, "similar_topics", similar)
+    return similar
+
+
+def test_decks_with_failed_slides_are_not_indexed(app_module, stub_backend, index):
+    stub_backend.fail_content = True
+    app_module.generate_deck("Machine Learning in Healthcare", include_images=False, slide_count=4)
+    assert index.stats()["entries"] == 0
+
+    stub_backend.fail_content = False
+    app_module.generate_deck("Machine Learning in Healthcare", include_images=False, slide_count=4)
+    assert index.stats()["entries"] == 1
+
+
+def test_near_duplicate_topic_reuses_the_stored_outline(app_module, stub_backend, index):
+    app_module.generate_deck("Machine Learning in Healthcare", include_images=False, slide_count=4)
+    calls = len(stub_backend.calls)
+    deck = app_module.generate_deck("machine learning in  healthcare", include_images=False, slide_count=4)
+    assert len(stub_backend.calls) == calls
+    assert deck["slides"][0]["title"] == "Origins"
+
+
+@pytest.mark.parametrize("query, stored", [
+    ("ML for Healthcare", "Machine Learning in Healthcare"),
+    ("Machine Learning for Healthcare", "Machine Learning in Healthcare"),
+    ("Machine Learning in Hospitals", "Machine learning in hospital"),
+    ("Healthcare Machine Learning", "Machine Learning in Healthcare"),
+])
+def test_rewordings_of_a_topic_match(app_module, query, stored):
+    terms = app_module.TopicTerms()
+    terms.add(1, app_module.topic_terms(stored))
+    terms.refresh()
+    assert terms.nearest(app_module.topic_terms(query)) == (1, pytest.approx(1.0))
+
+
+@pytest.mark.parametrize("query, stored", [
+    ("World War I Overview", "World War II Overview"),
+    ("WWI", "WWII"),
+    ("Introduction to Java Programming", "Introduction to Python Programming"),
+    ("History of Ancient Greece", "History of Ancient Egypt"),
+    ("Machine Learning", "Machine Learning in Healthcare"),
+    ("Climate Report 2023", "Climate Report 2024"),
+])
+def test_different_topics_do_not_match(app_module, query, stored):
+    terms = app_module.TopicTerms()
+    terms.add(1, app_module.topic_terms(stored))
+    terms.refresh()
+    assert terms.nearest(app_module.topic_terms(query))[1] < app_module.SIMILAR_TOPIC_THRESHOLD
+
+
+def test_lookup_finds_the_reworded_topic_among_others(index):
+    for topic in ("History of Ancient Egypt", "Machine Learning in Healthcare", "Introduction to Python Programming"):
+        index.add(topic, "en", False, [topic], [""])
+    assert index.lookup("ML for healthcare", "en", False, 1)["topic"] == "Machine Learning in Healthcare"
+    assert index.lookup("History of Ancient Greece", "en", False, 1) is None
+    assert index.lookup("ML for healthcare", "en", True, 1) is None
+    assert index.stats()["hits"] == 1
+
+
+def test_lookup_stays_under_a_millisecond_at_twenty_thousand_topics(app_module):
+    rng = random.Random(0)
+    # Zipf-like word frequencies, so common words have long postings
+    words = [f"word{index}x" for index in range(5000)]
+    frequencies = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+    def random_topic():
+        return app_module.topic_terms(" ".join(rng.choices(words, cum_weights=frequencies, k=rng.randint(2, 6))))
+
+    terms = app_module.TopicTerms()
+    for row_id in range(20000):
+        terms.add(row_id, random_topic())
+    terms.add(20000, app_module.topic_terms("Machine Learning in Healthcare"))
+    terms.refresh()
+    queries = [random_topic() for _ in range(200)]
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        terms.nearest(query)
+        timings.append(time.perf_counter() - start)
+    assert statistics.median(timings) < 0.001
+    assert terms.nearest(app_module.topic_terms("ML for Healthcare")) == (20000, pytest.approx(1.0))